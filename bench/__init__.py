@@ -0,0 +1,197 @@
+# Benchmark de carga: lanza cada escenario (ver scenarios.py) con un número fijo
+# de peticiones y de clientes en paralelo, y mide rendimiento y latencias.
+# Los resultados se guardan en JSON para compararlos entre commits.
+
+import asyncio
+import json
+import platform
+import subprocess
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+import httpx
+from bench.scenarios import SCENARIOS, Catalog
+
+RESULTS_DIR = Path(__file__).parent / "results"
+
+# Margen por defecto antes de considerar una diferencia como regresión
+DEFAULT_TOLERANCE = 0.10
+
+
+# Percentil por rango más cercano; ``values`` ya ordenados
+def percentile(values, p):
+    if not values:
+        return 0.0
+    rank = max(0, min(len(values) - 1, round(p / 100 * len(values) + 0.5) - 1))
+    return values[rank]
+
+
+def summarize(latencies, statuses, errors, elapsed):
+    latencies = sorted(latencies)
+    ms = lambda seconds: round(seconds * 1000, 3)
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "statuses": dict(sorted(statuses.items())),
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": {
+            "mean": ms(sum(latencies) / len(latencies)) if latencies else 0.0,
+            "p50": ms(percentile(latencies, 50)),
+            "p95": ms(percentile(latencies, 95)),
+            "p99": ms(percentile(latencies, 99)),
+            "max": ms(latencies[-1]) if latencies else 0.0,
+        },
+    }
+
+
+async def run_scenario(client, scenario, catalog, requests, concurrency, record=True):
+    latencies, statuses = [], Counter()
+    errors = 0
+    issued = 0
+
+    async def worker():
+        nonlocal issued, errors
+        while issued < requests:
+            issued += 1
+            request = scenario.build(catalog)
+            start = time.perf_counter()
+            try:
+                response = await client.request(**request)
+                status = response.status_code
+            except httpx.HTTPError:
+                response, status = None, "error"
+            latencies.append(time.perf_counter() - start)
+            statuses[str(status)] += 1
+            if status not in scenario.expect:
+                errors += 1
+            elif scenario.after is not None:
+                scenario.after(catalog, response)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(min(concurrency, requests))))
+    elapsed = time.perf_counter() - start
+    return summarize(latencies, statuses, errors, elapsed) if record else None
+
+
+def select_scenarios(only=None, writes=False):
+    return [
+        s for s in SCENARIOS
+        if (writes or not s.write) and (not only or any(o in s.name for o in only))
+    ]
+
+
+async def run(catalog, client, scenarios, requests=500, concurrency=10, warmup=20, log=print):
+    results = {}
+    for scenario in scenarios:
+        # Calentamiento (cachés, planes, conexiones) sin medir; las escrituras no se calientan
+        if warmup and not scenario.write:
+            await run_scenario(client, scenario, catalog, min(warmup, scenario.total_requests(catalog, warmup)),
+                               concurrency, record=False)
+        total = scenario.total_requests(catalog, requests)
+        if total == 0:
+            log(f"{scenario.name:<28} omitido (no hay datos)")
+            continue
+        result = await run_scenario(client, scenario, catalog, total, concurrency)
+        results[scenario.name] = result
+        lat = result["latency_ms"]
+        log(f"{scenario.name:<28} {result['throughput_rps']:>9.1f} req/s  "
+            f"p50 {lat['p50']:>8.2f}  p95 {lat['p95']:>8.2f}  p99 {lat['p99']:>8.2f} ms"
+            + (f"  errores {result['errors']}" if result["errors"] else ""))
+    return results
+
+
+# Cliente contra un servidor en marcha o, sin URL, contra la app en el mismo proceso
+async def benchmark(conn, url=None, requests=500, concurrency=10, warmup=20, writes=False,
+                    only=None, seed=0, log=print):
+    import database
+
+    catalog = Catalog(conn, seed=seed)
+    scenarios = select_scenarios(only, writes)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    timeout = httpx.Timeout(60.0)
+
+    if url:
+        client = httpx.AsyncClient(base_url=url, limits=limits, timeout=timeout)
+    else:
+        from main import app
+        await database.pool.open()
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench",
+                                   limits=limits, timeout=timeout)
+    try:
+        async with client:
+            results = await run(catalog, client, scenarios, requests, concurrency, warmup, log)
+    finally:
+        if not url:
+            await database.pool.close()
+
+    return {
+        "meta": {
+            "started_at": datetime.now(timezone.utc).isoformat(),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "target": url or "in-process",
+            "requests": requests,
+            "concurrency": concurrency,
+            "warmup": warmup,
+            "writes": writes,
+            "catalog": catalog.counts,
+        },
+        "scenarios": results,
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def save(results, path=None):
+    if path is None:
+        RESULTS_DIR.mkdir(exist_ok=True)
+        path = RESULTS_DIR / f"{results['meta']['commit'] or 'local'}.json"
+    path = Path(path)
+    path.write_text(json.dumps(results, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+    return path
+
+
+# Métricas comparadas: (nombre, valor, mayor es mejor, cuenta como regresión)
+COMPARED = (
+    ("req/s", lambda r: r["throughput_rps"], True, True),
+    ("p50", lambda r: r["latency_ms"]["p50"], False, False),
+    ("p95", lambda r: r["latency_ms"]["p95"], False, True),
+    ("p99", lambda r: r["latency_ms"]["p99"], False, True),
+)
+
+
+# Compara dos resultados; devuelve los escenarios que han empeorado más que ``tolerance``
+def compare(base, new, tolerance=DEFAULT_TOLERANCE, log=print):
+    regressions = []
+    log(f"{'escenario':<28} " + " ".join(f"{name:>18}" for name, *_ in COMPARED))
+    for scenario, after in new["scenarios"].items():
+        before = base["scenarios"].get(scenario)
+        if before is None:
+            log(f"{scenario:<28} (nuevo)")
+            continue
+
+        cells, worse = [], []
+        for name, value, higher_is_better, gated in COMPARED:
+            old, cur = value(before), value(after)
+            change = (cur - old) / old if old else 0.0
+            cells.append(f"{cur:>9.2f} {change:>+8.1%}")
+            if gated and (-change if higher_is_better else change) > tolerance:
+                worse.append(name)
+        if after["errors"] > before["errors"]:
+            worse.append("errores")
+        log(f"{scenario:<28} " + " ".join(cells) + (f"  <- {', '.join(worse)}" if worse else ""))
+        if worse:
+            regressions.append({"scenario": scenario, "metrics": worse})
+    return regressions
+
+
+def load(path):
+    return json.loads(Path(path).read_text(encoding="utf-8"))
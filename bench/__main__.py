@@ -0,0 +1,51 @@
+import argparse
+import asyncio
+import sys
+from bench import DEFAULT_TOLERANCE, benchmark, compare, load, save
+from migrations import connect
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m bench", description="Benchmark de carga de la API.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    cmd_run = commands.add_parser("run", help="Lanzar los escenarios y guardar los resultados en JSON.")
+    cmd_run.add_argument("--url", default=None, help="Servidor a medir; sin URL se usa la app en este proceso.")
+    cmd_run.add_argument("--requests", type=int, default=500, help="Peticiones por escenario.")
+    cmd_run.add_argument("--concurrency", type=int, default=10, help="Peticiones en paralelo.")
+    cmd_run.add_argument("--warmup", type=int, default=20, help="Peticiones sin medir antes de cada escenario.")
+    cmd_run.add_argument("--writes", action="store_true", help="Incluir escenarios de escritura.")
+    cmd_run.add_argument("--only", action="append", help="Solo escenarios cuyo nombre contenga este texto.")
+    cmd_run.add_argument("--seed", type=int, default=0, help="Semilla de los datos de las peticiones.")
+    cmd_run.add_argument("--out", default=None, help="Fichero de resultados (por defecto bench/results/<commit>.json).")
+
+    cmd_compare = commands.add_parser("compare", help="Comparar dos resultados y detectar regresiones.")
+    cmd_compare.add_argument("base")
+    cmd_compare.add_argument("new")
+    cmd_compare.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                             help="Empeoramiento relativo permitido (0.10 = 10%%).")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "compare":
+        regressions = compare(load(args.base), load(args.new), tolerance=args.tolerance)
+        if regressions:
+            print(f"{len(regressions)} escenarios han empeorado más de un {args.tolerance:.0%}.")
+            return 1
+        print("Sin regresiones.")
+        return 0
+
+    # Los datos se cargan con "python -m migrations seed --yes"
+    with connect() as conn:
+        if args.command == "run":
+            results = asyncio.run(benchmark(
+                conn, url=args.url, requests=args.requests, concurrency=args.concurrency,
+                warmup=args.warmup, writes=args.writes, only=args.only, seed=args.seed
+            ))
+            print(f"Resultados guardados en {save(results, args.out)}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
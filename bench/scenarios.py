@@ -0,0 +1,218 @@
+# Escenarios del benchmark: una o varias peticiones por ruta de routes/.
+# Las lecturas usan ids reales del catálogo sembrado; las escrituras trabajan
+# sobre productos y marcas creados por el propio benchmark (con los ids que
+# devuelve la API) y los borran al final.
+
+import random
+import uuid
+
+
+class Catalog:
+    """Muestra de ids del catálogo y objetos creados durante la ejecución."""
+
+    def __init__(self, conn, seed=0, sample=1000):
+        self.rng = random.Random(seed)
+        self.product_ids = [str(row[0]) for row in conn.execute(
+            "SELECT id FROM products_v2 ORDER BY id LIMIT %s", (sample,)
+        ).fetchall()]
+        if not self.product_ids:
+            raise RuntimeError("El catálogo está vacío; ejecuta antes 'python -m migrations seed --yes'.")
+        self.categories = [row[0] for row in conn.execute("SELECT id FROM categories ORDER BY id").fetchall()]
+        self.statuses = [row[0] for row in conn.execute("SELECT id FROM phone_status ORDER BY id").fetchall()]
+        self.brands = [row[0] for row in conn.execute("SELECT id FROM brands_v2 ORDER BY id").fetchall()]
+        self.tags = [row[0] for row in conn.execute(
+            "SELECT DISTINCT unnest(tags) FROM (SELECT tags FROM products_v2 LIMIT %s) t", (sample,)
+        ).fetchall()]
+        self.counts = dict(zip(
+            ("products", "prices", "reviews", "users"),
+            conn.execute("""
+                SELECT (SELECT count(*) FROM products_v2), (SELECT count(*) FROM prices_v2),
+                       (SELECT count(*) FROM reviews), (SELECT count(*) FROM users)
+            """).fetchone()
+        ))
+
+        # Creados por los escenarios de escritura
+        self.created_products = []
+        self.created_brands = []
+        self.emptied_products = []   # sin precios, pendientes de borrar
+        self._next = 0
+
+    # Recorre los productos creados en orden, para que todos pasen por el escenario
+    def next_created(self):
+        product_id = self.created_products[self._next % len(self.created_products)]
+        self._next += 1
+        return product_id
+
+    def product_id(self):
+        return self.rng.choice(self.product_ids)
+
+    def new_product(self, **extra):
+        token = uuid.uuid4().hex[:12]
+        return {
+            "category": self.rng.choice(self.categories),
+            "brand": self.rng.choice(self.brands),
+            "name_short": f"Bench {token}",
+            "name": f"Bench {token} 128GB",
+            "colors": ["negro"],
+            "storages": [128],
+            "images": [f"https://img.example/bench/{token}.jpg"],
+            "tags": ["bench", "movil"],
+            **extra,
+        }
+
+
+class Scenario:
+    """Una ruta a medir.
+
+    ``build(catalog)`` devuelve los argumentos de ``httpx.AsyncClient.request``.
+    ``after(catalog, response)`` se llama con cada respuesta correcta.
+    ``limit(catalog)`` acota el número de peticiones; con ``drain`` se lanzan
+    exactamente ``limit(catalog)`` (p. ej. un borrado por cada objeto creado).
+    """
+
+    def __init__(self, name, build, expect=(200,), after=None, limit=None, requests=None,
+                 drain=False, write=False):
+        self.name = name
+        self.build = build
+        self.expect = expect
+        self.after = after
+        self.limit = limit
+        self.requests = requests
+        self.drain = drain
+        self.write = write
+
+    def total_requests(self, catalog, default):
+        if self.drain:
+            return self.limit(catalog)
+        total = self.requests or default
+        if self.limit is not None:
+            total = min(total, self.limit(catalog))
+        return total
+
+
+def _get(url, **params):
+    return {"method": "GET", "url": url, "params": params}
+
+
+# Escrituras
+# El id lo asigna Postgres: se guarda el de la respuesta
+def _create_product(c):
+    return {"method": "POST", "url": "/products", "json": c.new_product()}
+
+
+def _product_created(c, response):
+    c.created_products.append(response.json()["data"]["id"])
+
+
+def _bulk_products(c):
+    return {"method": "POST", "url": "/products/bulk", "json": [c.new_product() for _ in range(50)]}
+
+
+def _products_imported(c, response):
+    c.created_products.extend(
+        row["id"] for row in response.json()["data"]["rows"] if row["result"] == "created"
+    )
+
+
+def _update_product(c):
+    product_id = c.rng.choice(c.created_products)
+    return {"method": "PUT", "url": "/products", "params": {"id": product_id}, "json": c.new_product()}
+
+
+# Un precio por producto creado (aún sin precios), sin repetir producto
+def _create_price(c):
+    price = {"id_product": c.next_created(), "status": c.rng.choice(c.statuses),
+             "price": round(c.rng.uniform(50, 1500), 2)}
+    return {"method": "POST", "url": "/prices", "json": price}
+
+
+def _upsert_prices(c):
+    variants = [{"status": s, "price": round(c.rng.uniform(50, 1500), 2)} for s in c.statuses]
+    return {"method": "POST", "url": "/prices/upsert",
+            "json": {"id_product": c.next_created(), "variants": variants}}
+
+
+def _update_price(c):
+    price = {"id_product": c.rng.choice(c.created_products), "status": c.rng.choice(c.statuses),
+             "price": round(c.rng.uniform(50, 1500), 2)}
+    return {"method": "PUT", "url": "/prices", "json": price}
+
+
+def _bulk_prices(c):
+    rows = [
+        {"id_product": c.rng.choice(c.created_products), "status": c.rng.choice(c.statuses),
+         "price": round(c.rng.uniform(50, 1500), 2)}
+        for _ in range(200)
+    ]
+    return {"method": "POST", "url": "/prices/bulk", "json": rows}
+
+
+def _delete_prices(c):
+    product_id = c.created_products.pop()
+    c.emptied_products.append(product_id)
+    return {"method": "DELETE", "url": "/prices", "params": {"id_product": product_id}}
+
+
+def _delete_product(c):
+    return {"method": "DELETE", "url": "/products", "params": {"id": c.emptied_products.pop()}}
+
+
+def _create_brand(c):
+    return {"method": "POST", "url": "/brands", "json": {"marca": f"Bench {uuid.uuid4().hex[:12]}"}}
+
+
+def _brand_created(c, response):
+    c.created_brands.append(response.json()["data"]["id"])
+
+
+def _update_brand(c):
+    return {"method": "PUT", "url": "/brands", "params": {"id": c.rng.choice(c.created_brands)},
+            "json": {"marca": f"Bench {uuid.uuid4().hex[:12]}"}}
+
+
+def _delete_brand(c):
+    return {"method": "DELETE", "url": "/brands", "params": {"id": c.created_brands.pop()}}
+
+
+# Orden de ejecución: las escrituras dependen de lo creado por las anteriores
+SCENARIOS = [
+    Scenario("GET /products", lambda c: _get("/products")),
+    Scenario("GET /products?limit=20", lambda c: _get("/products", limit=20)),
+    Scenario("GET /products?id", lambda c: _get("/products", id=c.product_id())),
+    Scenario("GET /products?category", lambda c: _get("/products", category=c.rng.choice(c.categories), limit=20)),
+    Scenario("GET /products?tags", lambda c: _get("/products", tags=c.rng.choice(c.tags), limit=20)),
+    Scenario("GET /products?fields", lambda c: _get("/products", fields="id,name,prices", limit=20)),
+    Scenario("GET /products?include_reviews", lambda c: _get("/products", include_reviews="true", limit=20)),
+    Scenario("GET /products/batch", lambda c: _get(
+        "/products/batch", ids=",".join(c.rng.sample(c.product_ids, min(20, len(c.product_ids))))
+    )),
+    Scenario("GET /products/search", lambda c: _get("/products/search", q="modelo", limit=20)),
+    Scenario("GET /products/summary", lambda c: _get("/products/summary", limit=20)),
+    Scenario("GET /products/export", lambda c: _get("/products/export"), requests=10),
+    Scenario("GET /prices", lambda c: _get("/prices", limit=20)),
+    Scenario("GET /prices?id", lambda c: _get("/prices", id=c.product_id())),
+    Scenario("GET /prices/history", lambda c: _get("/prices/history", id_product=c.product_id(), bucket="week")),
+    Scenario("GET /reviews", lambda c: _get("/reviews", limit=20)),
+    Scenario("GET /reviews?product_id", lambda c: _get("/reviews", product_id=c.product_id(), limit=20)),
+    Scenario("GET /reviews/summary", lambda c: _get("/reviews/summary", product_id=c.product_id())),
+    Scenario("GET /brands", lambda c: _get("/brands")),
+    Scenario("GET /brands?category", lambda c: _get("/brands", category=c.rng.choice(c.categories))),
+    Scenario("GET /categories", lambda c: _get("/categories")),
+    Scenario("GET /phone_status", lambda c: _get("/phone_status")),
+    Scenario("GET /admin/pool", lambda c: _get("/admin/pool")),
+    Scenario("GET /admin/cache", lambda c: _get("/admin/cache")),
+    Scenario("GET /admin/queries", lambda c: _get("/admin/queries")),
+
+    Scenario("POST /products", _create_product, expect=(201,), after=_product_created, write=True),
+    Scenario("POST /products/bulk", _bulk_products, after=_products_imported, requests=20, write=True),
+    Scenario("PUT /products", _update_product, limit=lambda c: len(c.created_products), write=True),
+    Scenario("POST /prices", _create_price, expect=(201,), limit=lambda c: len(c.created_products), write=True),
+    Scenario("POST /prices/upsert", _upsert_prices, limit=lambda c: len(c.created_products), drain=True, write=True),
+    Scenario("PUT /prices", _update_price, limit=lambda c: len(c.created_products), write=True),
+    Scenario("POST /prices/bulk", _bulk_prices, requests=20, limit=lambda c: len(c.created_products), write=True),
+    Scenario("POST /brands", _create_brand, expect=(201,), after=_brand_created, write=True),
+    Scenario("PUT /brands", _update_brand, limit=lambda c: len(c.created_brands), write=True),
+    Scenario("DELETE /brands", _delete_brand, limit=lambda c: len(c.created_brands), drain=True, write=True),
+    Scenario("DELETE /prices", _delete_prices, limit=lambda c: len(c.created_products), drain=True, write=True),
+    Scenario("DELETE /products", _delete_product, limit=lambda c: len(c.emptied_products), drain=True, write=True),
+]
@@ -0,0 +1,87 @@
+import os
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """Caché en memoria con caducidad por entrada y expulsión LRU.
+
+    Vive en el proceso del worker: cada worker tiene la suya.
+    """
+
+    def __init__(self, name, ttl, maxsize):
+        self.name = name
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data = OrderedDict()  # clave -> (caduca_en, valor)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._data[key]
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key, value):
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, key):
+        self._data.pop(key, None)
+
+    def clear(self):
+        self._data.clear()
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "name": self.name,
+            "ttl": self.ttl,
+            "maxsize": self.maxsize,
+            "size": len(self._data),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+        }
+
+
+# Clave de caché a partir del recurso y sus parámetros de consulta
+def make_key(resource, **params):
+    query = "&".join(f"{k}={'' if v is None else v}" for k, v in sorted(params.items()))
+    return f"{resource}?{query}" if query else resource
+
+
+def _new_cache(name, ttl, maxsize=128):
+    return TTLCache(
+        name,
+        ttl=float(os.getenv(f"cache_ttl_{name}", ttl)),
+        maxsize=int(os.getenv(f"cache_size_{name}", maxsize)),
+    )
+
+
+# Cachés de datos de referencia (tablas pequeñas que casi no cambian)
+categories_cache = _new_cache("categories", ttl=3600)
+phone_status_cache = _new_cache("phone_status", ttl=3600)
+brands_cache = _new_cache("brands", ttl=600)
+
+# Cuerpos comprimidos por ETag y codificación (ver compression.py)
+compressed_cache = _new_cache("compressed", ttl=3600, maxsize=512)
+
+caches = {
+    cache.name: cache
+    for cache in (categories_cache, phone_status_cache, brands_cache, compressed_cache)
+}
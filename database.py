@@ -1,6 +1,15 @@
 import os
-import psycopg2
+import time
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+import psycopg
+from psycopg.pq import TransactionStatus
 from dotenv import load_dotenv
+import metrics
+from replicas import Replica, ReplicaSet
+
+logger = logging.getLogger("backmarket.db")
 
 # Cargar variables de entorno
 load_dotenv()
@@ -14,5 +23,364 @@ DB_CONFIG = {
     "dbname": os.getenv("dbname"),
 }
 
-def get_db_connection():
-    return psycopg2.connect(**DB_CONFIG)
+# Sentencias preparadas en el servidor: psycopg prepara una consulta tras
+# ``prepare_threshold`` ejecuciones. Los poolers en modo transacción (PgBouncer,
+# Supabase en el puerto 6543) no las admiten, así que ahí se desactivan ("none").
+_prepare_threshold = os.getenv("prepare_threshold", "none" if DB_CONFIG["port"] == "6543" else "5")
+PREPARE_THRESHOLD = None if _prepare_threshold.lower() in ("", "none") else int(_prepare_threshold)
+
+# Configuración del pool de conexiones
+POOL_CONFIG = {
+    "min_size": int(os.getenv("pool_min_size", "1")),
+    "max_size": int(os.getenv("pool_max_size", "10")),
+    "timeout": float(os.getenv("pool_timeout", "5")),
+    "max_uses": int(os.getenv("pool_max_uses", "5000")),
+    "max_idle": float(os.getenv("pool_max_idle", "300")),
+    "check_interval": float(os.getenv("pool_check_interval", "30")),
+    "maintain_interval": float(os.getenv("pool_maintain_interval", "15")),
+}
+
+# Conexiones abiertas al arrancar el worker y espera máxima al apagarlo. El
+# calentamiento es pequeño a propósito: cada worker (WEB_CONCURRENCY) tiene su
+# pool, y las conexiones por encima de min_size se cierran tras max_idle.
+POOL_WARM_SIZE = int(os.getenv("pool_warm_size", str(max(POOL_CONFIG["min_size"], 2))))
+POOL_DRAIN_TIMEOUT = float(os.getenv("pool_drain_timeout", "10"))
+
+# Réplicas de lectura opcionales: DSNs separados por comas (ver replicas.py)
+REPLICA_DSNS = [dsn.strip() for dsn in os.getenv("replica_dsns", "").split(",") if dsn.strip()]
+REPLICA_CONFIG = {
+    "max_lag": float(os.getenv("replica_max_lag", "5")),
+    "balance": os.getenv("replica_balance", "round_robin"),
+    "check_interval": float(os.getenv("replica_check_interval", "1")),
+    "simulated_lag": float(os.getenv("replica_simulated_lag", "0")),
+}
+# Tiempo durante el que un cliente que ha escrito no lee de réplicas atrasadas
+READ_YOUR_WRITES_WINDOW = int(os.getenv("read_your_writes_window", "30"))
+
+
+class PoolTimeout(Exception):
+    """No se ha podido obtener una conexión del pool a tiempo."""
+
+
+class PoolClosed(Exception):
+    """El pool está cerrado y no entrega conexiones."""
+
+
+class ConnectionPool:
+    """Pool de conexiones asíncronas de psycopg.
+
+    - Mantiene entre ``min_size`` y ``max_size`` conexiones abiertas.
+    - ``getconn`` espera como mucho ``timeout`` segundos a que haya una libre.
+    - Al prestar una conexión que lleva más de ``check_interval`` segundos
+      sin usarse se comprueba con ``SELECT 1``.
+    - Las conexiones se reciclan tras ``max_uses`` préstamos o ``max_idle``
+      segundos inactivas.
+    - Cada ``maintain_interval`` segundos una tarea de fondo cierra las
+      conexiones inactivas caducadas y repone hasta ``min_size``: el pool se
+      encoge tras un pico y las peticiones no pagan la reconexión tras un
+      periodo tranquilo.
+    """
+
+    def __init__(self, conninfo, min_size=1, max_size=10, timeout=5.0,
+                 max_uses=5000, max_idle=300.0, check_interval=30.0, maintain_interval=15.0):
+        if min_size < 0 or max_size < 1 or min_size > max_size:
+            raise ValueError("Tamaño de pool no válido.")
+        self.conninfo = conninfo
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_uses = max_uses
+        self.max_idle = max_idle
+        self.check_interval = check_interval
+        self.maintain_interval = maintain_interval
+
+        self._cond = None      # asyncio.Condition, se crea en el bucle al abrir
+        self._idle = []        # [(conn, devuelta_en)]
+        self._uses = {}        # id(conn) -> número de préstamos
+        self._in_use = set()   # id(conn)
+        self._size = 0         # conexiones abiertas + en apertura
+        self._closed = True
+        self._maintainer = None
+
+        # Estadísticas
+        self._waiting = 0
+        self._requests = 0
+        self._served = 0
+        self._timeouts = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._opened = 0
+        self._recycled = 0
+        self._failed_checks = 0
+
+    # Ciclo de vida
+    async def open(self):
+        if not self._closed:
+            return
+        self._cond = asyncio.Condition()
+        self._closed = False
+        for _ in range(self.min_size):
+            self._size += 1
+            try:
+                conn = await self._connect()
+            except BaseException:
+                self._size -= 1
+                raise
+            async with self._cond:
+                self._idle.append((conn, time.monotonic()))
+                self._cond.notify()
+        self._maintainer = asyncio.create_task(self._maintain())
+
+    # Abrir de antemano conexiones hasta tener ``size`` (por defecto max_size)
+    async def warm(self, size=None):
+        if self._closed:
+            raise PoolClosed("El pool de conexiones está cerrado.")
+        size = min(size if size is not None else self.max_size, self.max_size)
+        async with self._cond:
+            missing = max(0, size - self._size)
+            self._size += missing
+        opened = await asyncio.gather(*(self._connect() for _ in range(missing)), return_exceptions=True)
+        async with self._cond:
+            for conn in opened:
+                if isinstance(conn, BaseException):
+                    self._size -= 1
+                else:
+                    self._idle.append((conn, time.monotonic()))
+            self._cond.notify_all()
+        return sum(not isinstance(conn, BaseException) for conn in opened)
+
+    # Esperar a que se devuelvan las conexiones prestadas (apagado ordenado)
+    async def drain(self, timeout):
+        deadline = time.monotonic() + timeout
+        while self._in_use:
+            if time.monotonic() >= deadline:
+                return False
+            await asyncio.sleep(0.05)
+        return True
+
+    async def close(self):
+        if self._closed:
+            return
+        if self._maintainer is not None:
+            self._maintainer.cancel()
+            self._maintainer = None
+        async with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._size -= len(idle)
+            self._cond.notify_all()
+        for conn, _ in idle:
+            await self._discard(conn)
+
+    @property
+    def closed(self):
+        return self._closed
+
+    # Préstamo y devolución
+    async def getconn(self):
+        if self._closed:
+            raise PoolClosed("El pool de conexiones está cerrado.")
+        start = time.monotonic()
+        deadline = start + self.timeout
+        async with self._cond:
+            self._requests += 1
+            self._waiting += 1
+            try:
+                while True:
+                    if self._closed:
+                        raise PoolClosed("El pool de conexiones está cerrado.")
+                    if self._idle:
+                        conn, returned_at = self._idle.pop()
+                        break
+                    if self._size < self.max_size:
+                        # Reservar el hueco y abrir la conexión fuera del lock
+                        self._size += 1
+                        conn, returned_at = None, None
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._timeouts += 1
+                        raise PoolTimeout(
+                            f"No hay conexiones libres tras {self.timeout:g}s "
+                            f"(máximo {self.max_size})."
+                        )
+                    try:
+                        await asyncio.wait_for(self._cond.wait(), remaining)
+                    except asyncio.TimeoutError:
+                        pass
+            finally:
+                self._waiting -= 1
+
+        try:
+            if conn is None:
+                conn = await self._connect()
+            elif not await self._healthy(conn, returned_at):
+                # Sustituir la conexión caducada o rota por una nueva
+                await self._discard(conn)
+                conn = await self._connect()
+        except BaseException:
+            async with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+
+        waited = time.monotonic() - start
+        metrics.POOL_ACQUIRE.observe(waited)
+        self._in_use.add(id(conn))
+        self._uses[id(conn)] = self._uses.get(id(conn), 0) + 1
+        self._served += 1
+        self._wait_total += waited
+        self._wait_max = max(self._wait_max, waited)
+        return conn
+
+    async def putconn(self, conn, discard=False):
+        key = id(conn)
+        if not discard and not conn.closed:
+            try:
+                status = conn.info.transaction_status
+                if status == TransactionStatus.UNKNOWN:
+                    discard = True
+                elif status != TransactionStatus.IDLE:
+                    await conn.rollback()
+            except psycopg.Error:
+                discard = True
+
+        async with self._cond:
+            self._in_use.discard(key)
+            expired = self._uses.get(key, 0) >= self.max_uses
+            if discard or conn.closed or expired or self._closed:
+                self._size -= 1
+                if expired:
+                    self._recycled += 1
+                to_close = conn
+            else:
+                self._idle.append((conn, time.monotonic()))
+                to_close = None
+            self._cond.notify()
+
+        if to_close is not None:
+            await self._discard(to_close)
+
+    @asynccontextmanager
+    async def connection(self):
+        conn = await self.getconn()
+        broken = False
+        try:
+            yield conn
+        except (psycopg.OperationalError, psycopg.InterfaceError):
+            broken = True
+            raise
+        finally:
+            await self.putconn(conn, discard=broken)
+
+    # Estadísticas
+    def stats(self):
+        return {
+            "size": self._size,
+            "min_size": self.min_size,
+            "max_size": self.max_size,
+            "in_use": len(self._in_use),
+            "idle": len(self._idle),
+            "waiters": self._waiting,
+            "requests": self._requests,
+            "timeouts": self._timeouts,
+            "wait_time_total": round(self._wait_total, 6),
+            "wait_time_avg": round(self._wait_total / self._served, 6) if self._served else 0.0,
+            "wait_time_max": round(self._wait_max, 6),
+            "connections_opened": self._opened,
+            "connections_recycled": self._recycled,
+            "failed_checks": self._failed_checks,
+        }
+
+    # Internos
+    async def _connect(self):
+        conn = await psycopg.AsyncConnection.connect(**self.conninfo)
+        self._opened += 1
+        self._uses[id(conn)] = 0
+        return conn
+
+    async def _healthy(self, conn, returned_at):
+        if conn.closed:
+            return False
+        idle_for = time.monotonic() - returned_at
+        if idle_for > self.max_idle:
+            self._recycled += 1
+            return False
+        if idle_for > self.check_interval:
+            try:
+                # Cursor sin instrumentar: la comprobación no es una consulta de la petición
+                await psycopg.AsyncCursor(conn).execute("SELECT 1")
+                await conn.rollback()
+            except psycopg.Error:
+                self._failed_checks += 1
+                return False
+        return True
+
+    # Mantenimiento en segundo plano (fuera del camino de las peticiones)
+    async def _maintain(self):
+        while True:
+            await asyncio.sleep(self.maintain_interval)
+            try:
+                await self._close_expired()
+                await self.warm(self.min_size)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("Error en el mantenimiento del pool: %s", e)
+
+    # Cerrar las conexiones inactivas más de ``max_idle``; ``warm(min_size)``
+    # repone después solo las necesarias para volver a ``min_size``
+    async def _close_expired(self):
+        now = time.monotonic()
+        async with self._cond:
+            expired = [conn for conn, returned_at in self._idle if now - returned_at > self.max_idle]
+            if not expired:
+                return
+            self._idle = [(conn, returned_at) for conn, returned_at in self._idle if now - returned_at <= self.max_idle]
+            self._size -= len(expired)
+            self._recycled += len(expired)
+        for conn in expired:
+            await self._discard(conn)
+
+    async def _discard(self, conn):
+        self._uses.pop(id(conn), None)
+        try:
+            await conn.close()
+        except Exception:
+            pass
+
+
+# Los cursores del pool miden cada consulta (ver metrics.py)
+pool = ConnectionPool(
+    {**DB_CONFIG, "cursor_factory": metrics.InstrumentedCursor, "prepare_threshold": PREPARE_THRESHOLD},
+    **POOL_CONFIG
+)
+
+replica_set = ReplicaSet(
+    [
+        Replica(f"replica{n}", ConnectionPool(
+            {"conninfo": dsn, "cursor_factory": metrics.InstrumentedCursor, "prepare_threshold": PREPARE_THRESHOLD},
+            **POOL_CONFIG
+        ))
+        for n, dsn in enumerate(REPLICA_DSNS, 1)
+    ],
+    primary=pool,
+    **REPLICA_CONFIG
+)
+
+# Estado del pool en /metrics
+for _stat in ("size", "in_use", "idle", "waiters", "timeouts"):
+    metrics.registry.append(metrics.Gauge(
+        f"db_pool_{_stat}", f"Pool de conexiones: {_stat}.",
+        lambda _stat=_stat: pool.stats()[_stat]
+    ))
+
+
+# Obtener una conexión del pool (usar con "async with"). Con ``read_only`` la
+# lectura puede ir a una réplica al día; sin réplicas disponibles, al primario.
+def get_db_connection(read_only=False):
+    if read_only:
+        replica = replica_set.choose()
+        if replica is not None:
+            return replica.pool.connection()
+    return pool.connection()
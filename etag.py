@@ -0,0 +1,108 @@
+import asyncio
+import hashlib
+import logging
+import os
+import random
+from fastapi import Request, Response
+
+logger = logging.getLogger("backmarket.db")
+
+# Cada cuánto se compactan las filas de table_versions de backends que ya no
+# existen (ver migrations/versions/0011); 0 lo desactiva
+COMPACT_INTERVAL = float(os.getenv("table_versions_compact_interval", "600"))
+
+# Tablas de las que depende cada recurso: su ETag cambia cuando cambia alguna
+RESOURCE_TABLES = {
+    "products": ("products_v2", "prices_v2", "phone_status"),
+    "products_reviews": ("products_v2", "prices_v2", "phone_status", "reviews"),
+    "products_summary": ("products_v2", "prices_v2"),
+    "prices": ("prices_v2",),
+    "price_history": ("prices_v2",),
+    "brands": ("brands_v2",),
+    "categories": ("categories",),
+    "phone_status": ("phone_status",),
+}
+
+
+# Leer las versiones de las tablas: suma de las filas de cada backend (mantenidas
+# por triggers, ver migrations/versions/0003 y 0011)
+async def get_table_versions(cursor, tables):
+    await cursor.execute(
+        "SELECT table_name, sum(version)::bigint FROM table_versions WHERE table_name = ANY(%s) GROUP BY table_name",
+        (list(tables),)
+    )
+    versions = dict(await cursor.fetchall())
+    return tuple(versions.get(table, 0) for table in tables)
+
+
+# ETag fuerte a partir del recurso, los parámetros de la petición y las versiones.
+# ``extra``: valores resueltos en el servidor que no están en la query (p. ej. fechas
+# por defecto que dependen de la hora actual)
+def make_etag(resource, request: Request, versions, extra=""):
+    raw = f"{resource}?{request.url.query}|{'.'.join(str(v) for v in versions)}|{extra}"
+    return '"' + hashlib.sha1(raw.encode()).hexdigest()[:32] + '"'
+
+
+async def resource_etag(cursor, resource, request: Request, extra=""):
+    versions = await get_table_versions(cursor, RESOURCE_TABLES[resource])
+    return make_etag(resource, request, versions, extra)
+
+
+# Codificaciones de CompressionMiddleware: cada una lleva su propia ETag fuerte
+ETAG_ENCODINGS = ("br", "gzip")
+
+
+# ETag de la versión comprimida: '"abc"' -> '"abc-br"'
+def encoded_etag(etag, encoding):
+    weak, tag = ("W/", etag[2:]) if etag.startswith("W/") else ("", etag)
+    return f'{weak}{tag[:-1]}-{encoding}"'
+
+
+# ETag sin el sufijo de codificación (y sin W/)
+def base_etag(tag):
+    tag = tag.strip().removeprefix("W/")
+    for encoding in ETAG_ENCODINGS:
+        suffix = f'-{encoding}"'
+        if tag.endswith(suffix):
+            return tag[:-len(suffix)] + '"'
+    return tag
+
+
+def etag_matches(request: Request, etag):
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    candidates = [base_etag(tag) for tag in header.split(",")]
+    return etag in candidates
+
+
+def not_modified(etag):
+    return Response(status_code=304, headers={"ETag": etag})
+
+
+# Sumar en la fila base las versiones de los backends cerrados, para que la
+# lectura de get_table_versions no crezca con cada backend que ha escrito
+async def compact_table_versions(conn):
+    cursor = await conn.execute("SELECT compact_table_versions()")
+    folded = (await cursor.fetchone())[0]
+    await conn.commit()
+    return folded
+
+
+# Tarea de fondo del worker (se arranca en el lifespan de main.py). Con varios
+# workers a la vez no hay problema: la segunda compactación no encuentra filas.
+async def compact_table_versions_periodically():
+    import database
+
+    while True:
+        # Con desfase aleatorio para que los workers no coincidan
+        await asyncio.sleep(COMPACT_INTERVAL * random.uniform(0.5, 1.5))
+        try:
+            async with database.get_db_connection() as conn:
+                folded = await compact_table_versions(conn)
+            if folded:
+                logger.info("table_versions: %d filas de backends cerrados compactadas", folded)
+        except Exception as e:
+            logger.warning("No se pudo compactar table_versions: %s", e)
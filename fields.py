@@ -0,0 +1,20 @@
+from fastapi import HTTPException
+
+
+# Validar ?fields=a,b,c contra los campos permitidos (en el orden de "allowed")
+def parse_fields(raw, allowed):
+    if not raw:
+        return list(allowed)
+    requested = [f.strip() for f in raw.split(",") if f.strip()]
+    invalid = [f for f in requested if f not in allowed]
+    if invalid:
+        raise HTTPException(status_code=400, detail="Campos no válidos: " + ", ".join(invalid))
+    if not requested:
+        raise HTTPException(status_code=400, detail="Debe indicar al menos un campo.")
+    return [f for f in allowed if f in requested]
+
+
+# json_build_object(...)::text solo con las columnas pedidas
+def json_object_sql(fields, allowed):
+    pairs = ", ".join(f"'{field}', {allowed[field]}" for field in fields)
+    return f"json_build_object({pairs})::text"
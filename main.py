@@ -1,30 +1,73 @@
+import asyncio
 import os
-import psycopg2
+import signal
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request, HTTPException
-from dotenv import load_dotenv
+from fastapi.encoders import jsonable_encoder
 from fastapi.middleware.cors import CORSMiddleware
-from routes import products, prices, brands, phone_status, reviews, categories
-from fastapi.responses import JSONResponse
-
-# Cargar variables de entorno
-load_dotenv()
-
-# Fetch variables
-USER = os.getenv("user")
-PASSWORD = os.getenv("password")
-HOST = os.getenv("host")
-PORT = os.getenv("port")
-DBNAME = os.getenv("dbname")
-
-# Conectar a PostgreSQL
-conn = psycopg2.connect(
-    user=USER,
-    password=PASSWORD,
-    host=HOST,
-    port=PORT,
-    dbname=DBNAME
-)
-cursor = conn.cursor()
+from routes import products, prices, brands, phone_status, reviews, categories, admin
+from fastapi.responses import JSONResponse, PlainTextResponse
+from responses import ORJSONResponse
+from compression import CompressionMiddleware
+from replicas import ReadYourWritesMiddleware
+from notifications import listener
+import psycopg
+import database
+import metrics
+from warmup import warm_up
+from etag import COMPACT_INTERVAL, compact_table_versions_periodically
+
+
+# Segundos que el worker sigue sirviendo tras SIGTERM con /readyz en 503, para
+# que el balanceador lo saque de la rotación antes de que deje de aceptar peticiones
+SHUTDOWN_DELAY = float(os.getenv("shutdown_delay", "5"))
+
+
+# Al recibir SIGTERM: marcar el worker como no listo y pasar la señal a uvicorn
+# tras SHUTDOWN_DELAY. Uvicorn ejecuta el apagado del lifespan cuando ya ha dejado
+# de servir, así que sin esto /readyz nunca llegaría a responder 503.
+def drain_on_sigterm(app):
+    previous = signal.getsignal(signal.SIGTERM)
+    if not callable(previous) or SHUTDOWN_DELAY <= 0:
+        return
+    loop = asyncio.get_running_loop()
+
+    def handler(sig, frame):
+        if not app.state.ready:
+            # Segunda señal (o aún arrancando): apagar ya
+            previous(sig, frame)
+            return
+        app.state.ready = False
+        loop.call_soon_threadsafe(loop.call_later, SHUTDOWN_DELAY, previous, sig, frame)
+
+    signal.signal(signal.SIGTERM, handler)
+
+
+# Arranque: abrir el pool, escuchar los avisos de cambios y calentar conexiones
+# y cachés antes de aceptar tráfico.
+# Apagado: dejar de estar listo (ya al recibir SIGTERM), esperar a las conexiones
+# prestadas y cerrar el pool.
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    app.state.ready = False
+    await database.pool.open()
+    await database.replica_set.open()
+    listener.start()
+    compactor = asyncio.create_task(compact_table_versions_periodically()) if COMPACT_INTERVAL > 0 else None
+    try:
+        await warm_up()
+        app.state.ready = True
+        drain_on_sigterm(app)
+        yield
+    finally:
+        app.state.ready = False
+        if compactor is not None:
+            compactor.cancel()
+        await listener.stop()
+        await database.replica_set.close(database.POOL_DRAIN_TIMEOUT)
+        await database.pool.drain(database.POOL_DRAIN_TIMEOUT)
+        await database.pool.close()
+
 
 # Crear aplicación FastAPI
 app = FastAPI(
@@ -35,6 +78,8 @@ app = FastAPI(
         "name": "Eduardo Oliva Garcia",
         "email": "eduolivag5@gmail.com",
     },
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
 # Configuración de CORS
@@ -46,21 +91,73 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compresión gzip/brotli de las respuestas grandes
+app.add_middleware(CompressionMiddleware, minimum_size=1024)
+
+# Lecturas en réplicas: los clientes que escriben leen después del primario
+app.add_middleware(ReadYourWritesMiddleware, replica_set=database.replica_set,
+                   window=database.READ_YOUR_WRITES_WINDOW)
+
+# Métricas por ruta (la más externa, para medir la petición completa)
+app.add_middleware(metrics.MetricsMiddleware)
+
 @app.exception_handler(HTTPException)
 async def custom_http_exception_handler(request: Request, exc: HTTPException):
     return JSONResponse(
         status_code=exc.status_code,
         content={
             "error": True,
-            "message": exc.detail,
+            # El detalle puede llevar valores de psycopg (UUID, datetime...)
+            "message": jsonable_encoder(exc.detail),
             "data": None
         },
     )
 
 
+# Pool agotado o cerrado: responder 503 con el mismo formato de error
+@app.exception_handler(database.PoolTimeout)
+@app.exception_handler(database.PoolClosed)
+async def pool_exception_handler(request: Request, exc: Exception):
+    return JSONResponse(
+        status_code=503,
+        content={
+            "error": True,
+            "message": str(exc),
+            "data": None
+        },
+    )
+
+
+# Liveness: el proceso responde
+@app.get("/healthz", include_in_schema=False)
+async def healthz():
+    return {"error": False, "message": "OK", "data": None}
+
+
+# Readiness: arranque terminado y la base de datos responde
+@app.get("/readyz", include_in_schema=False)
+async def readyz(request: Request):
+    if not getattr(request.app.state, "ready", False):
+        return JSONResponse(status_code=503, content={"error": True, "message": "Worker no listo.", "data": None})
+    try:
+        async with asyncio.timeout(2):
+            async with database.get_db_connection() as conn:
+                await psycopg.AsyncCursor(conn).execute("SELECT 1")
+    except Exception as e:
+        return JSONResponse(status_code=503, content={"error": True, "message": str(e) or "Base de datos no disponible.", "data": None})
+    return {"error": False, "message": "OK", "data": database.pool.stats()}
+
+
+# Métricas en formato de texto de Prometheus
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
 app.include_router(products.router)
 app.include_router(prices.router)
 app.include_router(brands.router)
 app.include_router(phone_status.router)
 app.include_router(reviews.router)
-app.include_router(categories.router)
\ No newline at end of file
+app.include_router(categories.router)
+app.include_router(admin.router)
\ No newline at end of file
@@ -0,0 +1,179 @@
+import time
+from contextvars import ContextVar
+import psycopg
+import profiling
+
+# Buckets de latencia en segundos
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=""):
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.label_names = labels
+        self._values = {}
+
+    def inc(self, *labels, amount=1):
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for labels, value in self._values.items():
+            lines.append(f"{self.name}{_labels(self.label_names, labels)} {_number(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.label_names = labels
+        self.buckets = tuple(buckets)
+        self._values = {}  # labels -> [contadores por bucket..., suma, total]
+
+    def observe(self, value, *labels):
+        entry = self._values.get(labels)
+        if entry is None:
+            entry = self._values[labels] = [0] * len(self.buckets) + [0.0, 0]
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                entry[i] += 1
+        entry[-2] += value
+        entry[-1] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for labels, entry in self._values.items():
+            for bound, count in zip(self.buckets, entry):
+                le = f'le="{_number(bound)}"'
+                lines.append(f"{self.name}_bucket{_labels(self.label_names, labels, le)} {count}")
+            inf = 'le="+Inf"'
+            lines.append(f"{self.name}_bucket{_labels(self.label_names, labels, inf)} {entry[-1]}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, labels)} {_number(entry[-2])}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, labels)} {entry[-1]}")
+        return lines
+
+
+class Gauge:
+    """Valor leído en el momento de generar /metrics."""
+
+    def __init__(self, name, help, read):
+        self.name = name
+        self.help = help
+        self.read = read
+
+    def render(self):
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge", f"{self.name} {_number(self.read())}"]
+
+
+REQUESTS = Counter("http_requests_total", "Peticiones HTTP por ruta y estado.", ("method", "route", "status"))
+REQUEST_LATENCY = Histogram("http_request_duration_seconds", "Duración de las peticiones HTTP.", ("method", "route"))
+REQUEST_QUERIES = Histogram("http_request_db_queries", "Consultas a la base de datos por petición.", ("route",), COUNT_BUCKETS)
+REQUEST_DB_TIME = Histogram("http_request_db_seconds", "Tiempo en la base de datos por petición.", ("route",))
+QUERY_LATENCY = Histogram("db_query_duration_seconds", "Duración de cada consulta.")
+POOL_ACQUIRE = Histogram("db_pool_acquire_seconds", "Espera para obtener una conexión del pool.")
+
+registry = [REQUESTS, REQUEST_LATENCY, REQUEST_QUERIES, REQUEST_DB_TIME, QUERY_LATENCY, POOL_ACQUIRE]
+
+
+def render():
+    lines = []
+    for metric in registry:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# Contadores de la petición en curso: [consultas, segundos en la base de datos, scope ASGI]
+request_db_stats: ContextVar[list | None] = ContextVar("request_db_stats", default=None)
+
+
+class InstrumentedCursor(psycopg.AsyncCursor):
+    """Cursor que mide cada consulta y la suma a la petición en curso."""
+
+    async def execute(self, query, params=None, **kwargs):
+        start = time.perf_counter()
+        try:
+            return await super().execute(query, params, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            _record_query(elapsed)
+            profiling.after_query(self, query, params, elapsed, _current_route())
+
+    async def executemany(self, query, params_seq, **kwargs):
+        start = time.perf_counter()
+        try:
+            return await super().executemany(query, params_seq, **kwargs)
+        finally:
+            _record_query(time.perf_counter() - start)
+
+
+def _record_query(elapsed):
+    QUERY_LATENCY.observe(elapsed)
+    stats = request_db_stats.get()
+    if stats is not None:
+        stats[0] += 1
+        stats[1] += elapsed
+
+
+def route_path(scope):
+    # Plantilla de la ruta (no la URL) para no disparar la cardinalidad
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+def _current_route():
+    stats = request_db_stats.get()
+    return route_path(stats[2]) if stats is not None else None
+
+
+class MetricsMiddleware:
+    """Middleware ASGI: cuenta peticiones y mide latencia y tiempo de base de datos por ruta."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        stats = [0, 0.0, scope]
+        token = request_db_stats.set(stats)
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            request_db_stats.reset(token)
+            path = route_path(scope)
+            method = scope["method"]
+            REQUESTS.inc(method, path, str(status))
+            REQUEST_LATENCY.observe(elapsed, method, path)
+            REQUEST_QUERIES.observe(stats[0], path)
+            REQUEST_DB_TIME.observe(stats[1], path)
+            profiling.after_request(path, stats[0], stats[1])
@@ -0,0 +1,112 @@
+import hashlib
+import re
+from pathlib import Path
+import psycopg
+from database import DB_CONFIG, PREPARE_THRESHOLD
+
+VERSIONS_DIR = Path(__file__).parent / "versions"
+
+# Número de lock de sesión para que dos procesos no migren a la vez
+MIGRATION_LOCK_ID = 727011
+
+
+class Migration:
+    def __init__(self, path: Path):
+        match = re.match(r"^(\d+)_(.+)\.sql$", path.name)
+        if not match:
+            raise ValueError(f"Nombre de migración no válido: {path.name}")
+        self.version = int(match.group(1))
+        self.name = match.group(2)
+        self.path = path
+
+    @property
+    def sql(self):
+        return self.path.read_text(encoding="utf-8")
+
+    @property
+    def checksum(self):
+        return hashlib.sha256(self.path.read_bytes()).hexdigest()
+
+
+# Migraciones disponibles, ordenadas por versión
+def load_migrations():
+    migrations = sorted((Migration(p) for p in VERSIONS_DIR.glob("*.sql")), key=lambda m: m.version)
+    versions = [m.version for m in migrations]
+    if len(set(versions)) != len(versions):
+        raise ValueError("Hay dos migraciones con el mismo número de versión.")
+    return migrations
+
+
+# Conexión en autocommit: cada migración abre su propia transacción. Los avisos
+# (RAISE WARNING) de las migraciones se muestran por consola.
+def connect():
+    conn = psycopg.connect(**DB_CONFIG, autocommit=True, prepare_threshold=PREPARE_THRESHOLD)
+    conn.add_notice_handler(_print_notice)
+    return conn
+
+
+def _print_notice(diag):
+    if diag.severity_nonlocalized == "WARNING":
+        print(f"{diag.severity}: {diag.message_primary}")
+
+
+def _ensure_table(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version integer PRIMARY KEY,
+            name text NOT NULL,
+            checksum text NOT NULL,
+            applied_at timestamptz NOT NULL DEFAULT now()
+        )
+    """)
+
+
+def applied_migrations(conn):
+    _ensure_table(conn)
+    rows = conn.execute("SELECT version, name, checksum, applied_at FROM schema_migrations ORDER BY version").fetchall()
+    return {version: (name, checksum, applied_at) for version, name, checksum, applied_at in rows}
+
+
+# Estado de cada migración: aplicada, pendiente o modificada después de aplicarse
+def status(conn):
+    applied = applied_migrations(conn)
+    result = []
+    for migration in load_migrations():
+        if migration.version not in applied:
+            state = "pending"
+            applied_at = None
+        else:
+            _, checksum, applied_at = applied[migration.version]
+            state = "applied" if checksum == migration.checksum else "modified"
+        result.append({
+            "version": migration.version,
+            "name": migration.name,
+            "state": state,
+            "applied_at": applied_at,
+        })
+    return result
+
+
+# Aplicar las migraciones pendientes (cada una en su propia transacción)
+def upgrade(conn, target=None, log=print):
+    _ensure_table(conn)
+    conn.execute("SELECT pg_advisory_lock(%s)", (MIGRATION_LOCK_ID,))
+    try:
+        applied = applied_migrations(conn)
+        done = []
+        for migration in load_migrations():
+            if migration.version in applied:
+                continue
+            if target is not None and migration.version > target:
+                break
+            log(f"Aplicando {migration.version:04d}_{migration.name}...")
+            with conn.transaction():
+                conn.execute(migration.sql)
+                conn.execute(
+                    "INSERT INTO schema_migrations (version, name, checksum) VALUES (%s, %s, %s)",
+                    (migration.version, migration.name, migration.checksum)
+                )
+            done.append(migration.version)
+        return done
+    finally:
+        conn.execute("SELECT pg_advisory_unlock(%s)", (MIGRATION_LOCK_ID,))
@@ -0,0 +1,62 @@
+import argparse
+import asyncio
+import sys
+from migrations import connect, status, upgrade
+from migrations.seed import seed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m migrations", description="Migraciones del esquema de la API.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    cmd_upgrade = commands.add_parser("upgrade", help="Aplicar las migraciones pendientes.")
+    cmd_upgrade.add_argument("--target", type=int, default=None, help="Última versión a aplicar.")
+
+    commands.add_parser("status", help="Mostrar el estado de las migraciones.")
+
+    cmd_seed = commands.add_parser("seed", help="Vaciar las tablas y cargar un catálogo sintético (solo local).")
+    cmd_seed.add_argument("--products", type=int, default=10_000)
+    cmd_seed.add_argument("--variants", type=int, default=4, help="Precios (estados) por producto.")
+    cmd_seed.add_argument("--reviews", type=int, default=20_000)
+    cmd_seed.add_argument("--users", type=int, default=1_000)
+    cmd_seed.add_argument("--categories", type=int, default=5)
+    cmd_seed.add_argument("--brands", type=int, default=20)
+    cmd_seed.add_argument("--yes", action="store_true", help="Confirmar que se borrarán los datos existentes.")
+
+    cmd_check = commands.add_parser("check-plans", help="EXPLAIN de las consultas de los routers.")
+    cmd_check.add_argument("--threshold", type=int, default=None,
+                           help="Filas a partir de las cuales un Seq Scan es un error (por defecto 1000).")
+
+    args = parser.parse_args(argv)
+
+    with connect() as conn:
+        if args.command == "upgrade":
+            done = upgrade(conn, target=args.target)
+            print(f"{len(done)} migraciones aplicadas." if done else "No hay migraciones pendientes.")
+
+        elif args.command == "status":
+            for row in status(conn):
+                print(f"{row['version']:04d}  {row['state']:<8}  {row['name']}  {row['applied_at'] or ''}")
+
+        elif args.command == "seed":
+            if not args.yes:
+                print("seed borra todos los datos del catálogo; repite con --yes para continuar.")
+                return 2
+            seed(conn, products=args.products, variants=args.variants, reviews=args.reviews,
+                 users=args.users, categories=args.categories, brands=args.brands)
+
+        elif args.command == "check-plans":
+            # httpx solo está en requirements-dev.txt: no cargarlo para upgrade/status
+            from migrations.plancheck import SEQ_SCAN_ROW_THRESHOLD, check_plans
+            threshold = args.threshold if args.threshold is not None else SEQ_SCAN_ROW_THRESHOLD
+            failures = asyncio.run(check_plans(conn, threshold=threshold))
+            if failures:
+                print(f"{len(failures)} consultas usan Seq Scan sobre tablas grandes.")
+                return 1
+            print("Todos los planes usan índices.")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,144 @@
+# Comprobación de planes de consulta: lanza las peticiones GET de los routers
+# contra una base de datos local con datos, registra cada consulta que emiten
+# y hace EXPLAIN de todas, junto con las búsquedas de las rutas de escritura
+# (WRITE_QUERIES, con EXPLAIN sin ANALYZE: no se ejecutan). Falla si alguna
+# recorre con Seq Scan una tabla con más filas que el umbral.
+
+import httpx
+import database
+import metrics
+from database import DB_CONFIG, POOL_CONFIG, ConnectionPool
+
+# Filas a partir de las cuales un Seq Scan se considera regresión
+SEQ_SCAN_ROW_THRESHOLD = 1000
+
+# Consultas de las rutas de escritura (POST/PUT/DELETE), copiadas de routes/.
+# Los parámetros salen de una fila real (ver build_write_queries).
+WRITE_QUERIES = [
+    ("POST /products", "SELECT id FROM products_v2 WHERE name = %(name)s OR name_short = %(name_short)s"),
+    ("POST /products/bulk",
+     "SELECT id, name, name_short FROM products_v2 WHERE name = ANY(%(names)s) OR name_short = ANY(%(names)s)"),
+    ("PUT /products", "SELECT 1 FROM products_v2 WHERE id = %(product_id)s"),
+    ("PUT /products", """
+        UPDATE products_v2
+        SET category = category, brand = brand, name_short = name_short, name = name,
+            colors = colors, storages = storages, images = images, tags = tags
+        WHERE id = %(product_id)s
+    """),
+    ("DELETE /products", "DELETE FROM products_v2 WHERE id = %(product_id)s"),
+    ("PUT /prices", "UPDATE prices_v2 SET price = price WHERE id_product = %(product_id)s and status = %(status)s"),
+    ("DELETE /prices", "DELETE FROM prices_v2 WHERE id_product = %(product_id)s"),
+    ("DELETE /prices", "DELETE FROM prices_v2 WHERE id = %(price_id)s"),
+    ("GET /prices/stream", "SELECT 1 FROM products_v2 WHERE id = %(product_id)s"),
+    ("PUT /brands", "SELECT 1 FROM brands_v2 WHERE id = %(brand_id)s"),
+    ("DELETE /brands", "DELETE FROM brands_v2 WHERE id = %(brand_id)s"),
+]
+
+
+class RecordingCursor(metrics.InstrumentedCursor):
+    """Cursor que guarda cada consulta ejecutada junto con la ruta que la lanzó."""
+
+    route = None
+    queries = []
+
+    async def execute(self, query, params=None, **kwargs):
+        RecordingCursor.queries.append((RecordingCursor.route, query, params))
+        return await super().execute(query, params, **kwargs)
+
+
+# Peticiones a lanzar, con ids reales de la base de datos
+def build_requests(conn):
+    product_id, category, tag = conn.execute(
+        "SELECT id, category, tags[1] FROM products_v2 ORDER BY id LIMIT 1"
+    ).fetchone()
+    brand_category = conn.execute("SELECT category FROM brands_v2 WHERE category IS NOT NULL LIMIT 1").fetchone()
+    return [
+        "/products",
+        f"/products?limit=20&id={product_id}",
+        f"/products/batch?ids={product_id}",
+        f"/products?category={category}&limit=20",
+        f"/products?tags={tag}&limit=20",
+        "/products/summary?limit=20",
+        f"/products/summary?category={category}&limit=20",
+        "/products/search?q=modelo&limit=20",
+        "/prices?limit=20",
+        f"/prices?id={product_id}",
+        f"/prices/history?id_product={product_id}",
+        f"/prices/history?id_product={product_id}&status=1&bucket=week",
+        "/reviews?limit=20",
+        f"/reviews?product_id={product_id}&limit=20",
+        f"/reviews/summary?product_id={product_id}",
+        "/reviews/summary?limit=20",
+        "/products?limit=20&include_reviews=true",
+        "/brands",
+        f"/brands?category={brand_category[0] if brand_category else 1}",
+        "/categories",
+        "/phone_status",
+    ]
+
+
+# Consultas de WRITE_QUERIES con sus parámetros
+def build_write_queries(conn):
+    product_id, name, name_short, price_id, status = conn.execute("""
+        SELECT p.id, p.name, p.name_short, pr.id, pr.status
+        FROM products_v2 p JOIN prices_v2 pr ON pr.id_product = p.id
+        ORDER BY p.id LIMIT 1
+    """).fetchone()
+    brand_id = conn.execute("SELECT id FROM brands_v2 ORDER BY id LIMIT 1").fetchone()
+    params = {
+        "product_id": product_id, "name": name, "name_short": name_short, "names": [name, name_short],
+        "price_id": price_id, "status": status, "brand_id": brand_id[0] if brand_id else 1,
+    }
+    return [(route, query, params) for route, query in WRITE_QUERIES]
+
+
+def _seq_scans(plan):
+    found = []
+    if plan.get("Node Type") == "Seq Scan":
+        found.append(plan["Relation Name"])
+    for child in plan.get("Plans", []):
+        found.extend(_seq_scans(child))
+    return found
+
+
+async def record_queries(paths):
+    from main import app
+
+    RecordingCursor.queries = []
+    database.pool = ConnectionPool({**DB_CONFIG, "cursor_factory": RecordingCursor}, **POOL_CONFIG)
+    await database.pool.open()
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://plancheck") as client:
+            for path in paths:
+                RecordingCursor.route = path
+                response = await client.get(path)
+                if response.status_code >= 500:
+                    raise RuntimeError(f"{path} respondió {response.status_code}: {response.text}")
+    finally:
+        await database.pool.close()
+    return RecordingCursor.queries
+
+
+# EXPLAIN (sin ANALYZE) de cada consulta; devuelve la lista de problemas
+def explain_queries(conn, queries, threshold=SEQ_SCAN_ROW_THRESHOLD, log=print):
+    sizes = dict(conn.execute("SELECT relname, reltuples FROM pg_class WHERE relkind IN ('r', 'p')").fetchall())
+    failures = []
+    for route, query, params in queries:
+        text = query if isinstance(query, str) else query.as_string(conn)
+        if not text.lstrip().upper().startswith(("SELECT", "WITH", "UPDATE", "DELETE")):
+            continue
+        plan = conn.execute("EXPLAIN (FORMAT JSON) " + text, params).fetchone()[0][0]["Plan"]
+        big_scans = [table for table in _seq_scans(plan) if sizes.get(table, 0) > threshold]
+        summary = " ".join(text.split())[:100]
+        if big_scans:
+            failures.append({"route": route, "query": summary, "seq_scans": big_scans})
+            log(f"FAIL {route}: Seq Scan en {', '.join(big_scans)} -> {summary}")
+        else:
+            log(f"ok   {route}: {summary}")
+    return failures
+
+
+async def check_plans(conn, threshold=SEQ_SCAN_ROW_THRESHOLD, log=print):
+    queries = await record_queries(build_requests(conn))
+    return explain_queries(conn, queries + build_write_queries(conn), threshold, log)
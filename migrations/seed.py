@@ -0,0 +1,60 @@
+# Catálogo sintético para pruebas locales (planes de consulta, benchmarks).
+# Todo se genera en el servidor con generate_series para que sea rápido.
+
+def seed(conn, products=10_000, variants=4, reviews=20_000, users=1_000, categories=5, brands=20, log=print):
+    with conn.transaction():
+        conn.execute("TRUNCATE reviews, users, price_history, prices_v2, products_v2, brands_v2, phone_status, categories RESTART IDENTITY CASCADE")
+
+        conn.execute(
+            "INSERT INTO categories (category) SELECT 'Categoria ' || g FROM generate_series(1, %s) g",
+            (categories,)
+        )
+        conn.execute("""
+            INSERT INTO phone_status (estado, descripcion, screen_tags, case_tags, status_order)
+            SELECT 'Estado ' || g, 'Descripcion del estado ' || g, ARRAY['pantalla'], ARRAY['carcasa'], g
+            FROM generate_series(1, %s) g
+        """, (max(variants, 1),))
+        conn.execute("""
+            INSERT INTO brands_v2 (marca, img_header, category)
+            SELECT 'Marca ' || g, 'https://img.example/brand/' || g || '.png', 1 + g %% %s
+            FROM generate_series(1, %s) g
+        """, (categories, brands))
+        log(f"Categorias: {categories}, marcas: {brands}, estados: {variants}")
+
+        conn.execute("""
+            INSERT INTO products_v2 (created_at, category, brand, name_short, name, colors, storages, images, tags)
+            SELECT now() - (g || ' minutes')::interval,
+                   1 + g %% %(categories)s,
+                   1 + g %% %(brands)s,
+                   'Modelo ' || g,
+                   'Marca ' || (1 + g %% %(brands)s) || ' Modelo ' || g || ' ' || (64 * (1 + g %% 4)) || 'GB',
+                   ARRAY['negro', 'blanco', 'azul'],
+                   ARRAY[64, 128, 256],
+                   ARRAY['https://img.example/p/' || g || '/1.jpg', 'https://img.example/p/' || g || '/2.jpg'],
+                   ARRAY['movil', 'tag' || (g %% 50), 'marca' || (1 + g %% %(brands)s)]
+            FROM generate_series(1, %(products)s) g
+        """, {"categories": categories, "brands": brands, "products": products})
+        log(f"Productos: {products}")
+
+        conn.execute("""
+            INSERT INTO prices_v2 (id_product, status, price)
+            SELECT p.id, s.id, round((100 + random() * 900)::numeric, 2)
+            FROM products_v2 p
+            CROSS JOIN (SELECT id FROM phone_status ORDER BY id LIMIT %s) s
+        """, (variants,))
+        log(f"Precios: {products * variants}")
+
+        conn.execute("INSERT INTO users (name) SELECT 'Usuario ' || g FROM generate_series(1, %s) g", (users,))
+        if products and users:
+            conn.execute("""
+                WITH p AS (SELECT id, row_number() OVER (ORDER BY id) - 1 AS n FROM products_v2),
+                     u AS (SELECT id, row_number() OVER (ORDER BY id) - 1 AS n FROM users)
+                INSERT INTO reviews (stars, comment, image, product_id, id_user)
+                SELECT 1 + floor(random() * 5), 'Comentario ' || g, '', p.id, u.id
+                FROM generate_series(1, %(reviews)s) g
+                JOIN p ON p.n = g %% %(products)s
+                JOIN u ON u.n = (g * 7) %% %(users)s
+            """, {"products": products, "users": users, "reviews": reviews})
+        log(f"Usuarios: {users}, reviews: {reviews}")
+
+    conn.execute("ANALYZE")
@@ -0,0 +1,59 @@
+-- Esquema base de la API. Usa IF NOT EXISTS para poder aplicarse también
+-- sobre la base de datos existente sin tocar las tablas que ya estén creadas.
+
+CREATE EXTENSION IF NOT EXISTS pgcrypto;
+
+CREATE TABLE IF NOT EXISTS categories (
+    id serial PRIMARY KEY,
+    category text NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS phone_status (
+    id serial PRIMARY KEY,
+    estado text NOT NULL,
+    descripcion text,
+    screen_tags text[] NOT NULL DEFAULT '{}',
+    case_tags text[] NOT NULL DEFAULT '{}',
+    status_order integer NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS brands_v2 (
+    id serial PRIMARY KEY,
+    marca text NOT NULL,
+    img_header text,
+    category integer REFERENCES categories (id)
+);
+
+CREATE TABLE IF NOT EXISTS products_v2 (
+    id uuid PRIMARY KEY DEFAULT gen_random_uuid(),
+    created_at timestamptz NOT NULL DEFAULT now(),
+    category integer REFERENCES categories (id),
+    brand integer REFERENCES brands_v2 (id),
+    name_short text NOT NULL,
+    name text NOT NULL,
+    colors text[] NOT NULL DEFAULT '{}',
+    storages integer[] NOT NULL DEFAULT '{}',
+    images text[] NOT NULL DEFAULT '{}',
+    tags text[] NOT NULL DEFAULT '{}'
+);
+
+CREATE TABLE IF NOT EXISTS prices_v2 (
+    id uuid PRIMARY KEY DEFAULT gen_random_uuid(),
+    id_product uuid NOT NULL REFERENCES products_v2 (id) ON DELETE CASCADE,
+    status integer NOT NULL REFERENCES phone_status (id),
+    price numeric(10, 2) NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS users (
+    id uuid PRIMARY KEY DEFAULT gen_random_uuid(),
+    name text NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS reviews (
+    id uuid PRIMARY KEY DEFAULT gen_random_uuid(),
+    stars real NOT NULL,
+    comment text,
+    image text,
+    product_id uuid NOT NULL REFERENCES products_v2 (id) ON DELETE CASCADE,
+    id_user uuid NOT NULL REFERENCES users (id)
+);
@@ -0,0 +1,22 @@
+-- Índices para las consultas más frecuentes de los routers.
+-- prices_v2.id_product queda cubierto por el índice único (id_product, status) de 0004.
+
+-- GET /brands?category=
+CREATE INDEX IF NOT EXISTS brands_v2_category_idx ON brands_v2 (category);
+
+-- GET /products?category= con paginación por id
+CREATE INDEX IF NOT EXISTS products_v2_category_id_idx ON products_v2 (category, id);
+
+-- GET /products?tags= (operador &&)
+CREATE INDEX IF NOT EXISTS products_v2_tags_idx ON products_v2 USING gin (tags);
+
+-- GET /products/export?since=
+CREATE INDEX IF NOT EXISTS products_v2_created_at_idx ON products_v2 (created_at);
+
+-- Búsqueda de duplicados en altas de productos
+CREATE INDEX IF NOT EXISTS products_v2_name_idx ON products_v2 (name);
+CREATE INDEX IF NOT EXISTS products_v2_name_short_idx ON products_v2 (name_short);
+
+-- Joins de reviews
+CREATE INDEX IF NOT EXISTS reviews_product_id_idx ON reviews (product_id);
+CREATE INDEX IF NOT EXISTS reviews_id_user_idx ON reviews (id_user);
@@ -0,0 +1,30 @@
+-- Contador de versión por tabla para ETags (If-None-Match / 304).
+-- Cada INSERT, UPDATE, DELETE o TRUNCATE incrementa la versión de la tabla.
+
+CREATE TABLE IF NOT EXISTS table_versions (
+    table_name text PRIMARY KEY,
+    version bigint NOT NULL DEFAULT 0
+);
+
+CREATE OR REPLACE FUNCTION bump_table_version() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO table_versions (table_name, version) VALUES (TG_TABLE_NAME, 1)
+    ON CONFLICT (table_name) DO UPDATE SET version = table_versions.version + 1;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DO $$
+DECLARE
+    t text;
+BEGIN
+    FOREACH t IN ARRAY ARRAY['products_v2', 'prices_v2', 'brands_v2', 'phone_status', 'categories', 'reviews'] LOOP
+        EXECUTE format('DROP TRIGGER IF EXISTS %I_version ON %I', t, t);
+        EXECUTE format(
+            'CREATE TRIGGER %I_version AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON %I '
+            'FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version()', t, t
+        );
+        INSERT INTO table_versions (table_name) VALUES (t) ON CONFLICT DO NOTHING;
+    END LOOP;
+END;
+$$;
@@ -0,0 +1,44 @@
+-- Una sola fila de precio por producto y estado: necesaria para
+-- INSERT ... ON CONFLICT (id_product, status) en las cargas masivas.
+--
+-- La comprobación anterior (SELECT y después INSERT) podía dejar dos filas
+-- para el mismo producto y estado si dos peticiones coincidían. Antes de crear
+-- el índice se deja una por pareja (la de menor id). Las demás se copian en
+-- prices_v2_duplicates para poder revisarlas, y se avisa de cuántas eran.
+
+CREATE TABLE IF NOT EXISTS prices_v2_duplicates (
+    id uuid PRIMARY KEY,
+    id_product uuid NOT NULL,
+    status integer NOT NULL,
+    price numeric(10, 2) NOT NULL,
+    kept_id uuid NOT NULL,
+    removed_at timestamptz NOT NULL DEFAULT now()
+);
+
+DO $$
+DECLARE
+    removed integer;
+BEGIN
+    WITH ranked AS (
+        SELECT id, id_product, status, price,
+               first_value(id) OVER (PARTITION BY id_product, status ORDER BY id) AS kept_id
+        FROM prices_v2
+    ),
+    duplicates AS (
+        DELETE FROM prices_v2 p
+        USING ranked r
+        WHERE p.id = r.id AND r.id <> r.kept_id
+        RETURNING r.id, r.id_product, r.status, r.price, r.kept_id
+    )
+    INSERT INTO prices_v2_duplicates (id, id_product, status, price, kept_id)
+    SELECT id, id_product, status, price, kept_id FROM duplicates;
+
+    GET DIAGNOSTICS removed = ROW_COUNT;
+    IF removed > 0 THEN
+        RAISE WARNING 'prices_v2: % precios duplicados (mismo producto y estado) movidos a prices_v2_duplicates', removed;
+    END IF;
+END;
+$$;
+
+CREATE UNIQUE INDEX IF NOT EXISTS prices_v2_id_product_status_key
+    ON prices_v2 (id_product, status);
@@ -0,0 +1,78 @@
+-- Resumen de precios por producto para los listados: precio mínimo y máximo,
+-- número de variantes y mejor precio por estado. Se mantiene de forma
+-- incremental con triggers sobre prices_v2 (solo se recalculan los productos
+-- afectados por cada sentencia).
+
+CREATE TABLE IF NOT EXISTS product_price_summary (
+    id_product uuid PRIMARY KEY REFERENCES products_v2 (id) ON DELETE CASCADE,
+    min_price numeric NOT NULL,
+    max_price numeric NOT NULL,
+    n_variants integer NOT NULL,
+    best_by_status jsonb NOT NULL,   -- {"<id phone_status>": precio}
+    updated_at timestamptz NOT NULL DEFAULT now()
+);
+
+CREATE OR REPLACE FUNCTION refresh_product_price_summary(ids uuid[]) RETURNS void AS $$
+BEGIN
+    DELETE FROM product_price_summary s
+    WHERE s.id_product = ANY(ids)
+      AND NOT EXISTS (SELECT 1 FROM prices_v2 pr WHERE pr.id_product = s.id_product);
+
+    INSERT INTO product_price_summary (id_product, min_price, max_price, n_variants, best_by_status, updated_at)
+    SELECT id_product, min(price), max(price), count(*), jsonb_object_agg(status, price), now()
+    FROM (
+        SELECT DISTINCT ON (id_product, status) id_product, status, price
+        FROM prices_v2
+        WHERE id_product = ANY(ids)
+        ORDER BY id_product, status, price
+    ) best
+    GROUP BY id_product
+    ON CONFLICT (id_product) DO UPDATE SET
+        min_price = EXCLUDED.min_price,
+        max_price = EXCLUDED.max_price,
+        n_variants = EXCLUDED.n_variants,
+        best_by_status = EXCLUDED.best_by_status,
+        updated_at = EXCLUDED.updated_at;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION prices_v2_summary_insert() RETURNS trigger AS $$
+BEGIN
+    PERFORM refresh_product_price_summary(ARRAY(SELECT DISTINCT id_product FROM new_rows));
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION prices_v2_summary_update() RETURNS trigger AS $$
+BEGIN
+    PERFORM refresh_product_price_summary(ARRAY(
+        SELECT id_product FROM new_rows UNION SELECT id_product FROM old_rows
+    ));
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION prices_v2_summary_delete() RETURNS trigger AS $$
+BEGIN
+    PERFORM refresh_product_price_summary(ARRAY(SELECT DISTINCT id_product FROM old_rows));
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS prices_v2_summary_insert ON prices_v2;
+CREATE TRIGGER prices_v2_summary_insert AFTER INSERT ON prices_v2
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION prices_v2_summary_insert();
+
+DROP TRIGGER IF EXISTS prices_v2_summary_update ON prices_v2;
+CREATE TRIGGER prices_v2_summary_update AFTER UPDATE ON prices_v2
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION prices_v2_summary_update();
+
+DROP TRIGGER IF EXISTS prices_v2_summary_delete ON prices_v2;
+CREATE TRIGGER prices_v2_summary_delete AFTER DELETE ON prices_v2
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION prices_v2_summary_delete();
+
+-- Carga inicial con los precios existentes
+SELECT refresh_product_price_summary(ARRAY(SELECT DISTINCT id_product FROM prices_v2));
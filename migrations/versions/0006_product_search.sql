@@ -0,0 +1,27 @@
+-- Búsqueda de productos: texto completo ponderado (tsvector generado) y
+-- coincidencia aproximada por trigramas (pg_trgm), ambos con índices GIN.
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+-- array_to_string no es IMMUTABLE; hace falta un envoltorio para usarlo en columnas generadas
+CREATE OR REPLACE FUNCTION tags_to_text(text[]) RETURNS text AS $$
+    SELECT coalesce(array_to_string($1, ' '), '')
+$$ LANGUAGE sql IMMUTABLE PARALLEL SAFE;
+
+ALTER TABLE products_v2 ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple', coalesce(name_short, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(name, '')), 'B') ||
+        setweight(to_tsvector('simple', tags_to_text(tags)), 'C')
+    ) STORED;
+
+ALTER TABLE products_v2 ADD COLUMN IF NOT EXISTS search_text text
+    GENERATED ALWAYS AS (
+        lower(coalesce(name_short, '') || ' ' || coalesce(name, '') || ' ' || tags_to_text(tags))
+    ) STORED;
+
+CREATE INDEX IF NOT EXISTS products_v2_search_vector_idx
+    ON products_v2 USING gin (search_vector);
+
+CREATE INDEX IF NOT EXISTS products_v2_search_text_trgm_idx
+    ON products_v2 USING gin (search_text gin_trgm_ops);
@@ -0,0 +1,113 @@
+-- Resumen de reseñas por producto: número, suma de estrellas e histograma
+-- (1 a 5, redondeando las medias estrellas). Se mantiene de forma incremental
+-- con triggers sobre reviews: cada sentencia suma o resta solo las filas que
+-- ha tocado, sin volver a leer las reseñas del producto.
+
+-- GET /reviews?product_id= con paginación por id (sustituye al índice de 0002)
+CREATE INDEX IF NOT EXISTS reviews_product_id_id_idx ON reviews (product_id, id);
+DROP INDEX IF EXISTS reviews_product_id_idx;
+
+CREATE TABLE IF NOT EXISTS product_review_summary (
+    product_id uuid PRIMARY KEY REFERENCES products_v2 (id) ON DELETE CASCADE,
+    n_reviews integer NOT NULL,
+    stars_sum double precision NOT NULL,
+    stars_1 integer NOT NULL DEFAULT 0,
+    stars_2 integer NOT NULL DEFAULT 0,
+    stars_3 integer NOT NULL DEFAULT 0,
+    stars_4 integer NOT NULL DEFAULT 0,
+    stars_5 integer NOT NULL DEFAULT 0,
+    updated_at timestamptz NOT NULL DEFAULT now()
+);
+
+CREATE OR REPLACE FUNCTION review_star_bucket(stars real) RETURNS integer AS $$
+    SELECT greatest(1, least(5, round(stars)::integer));
+$$ LANGUAGE sql IMMUTABLE;
+
+-- Aplicar deltas (signo +1 alta, -1 baja) agrupados por producto
+CREATE OR REPLACE FUNCTION apply_review_deltas(ids uuid[], star_values real[], signs integer[]) RETURNS void AS $$
+BEGIN
+    INSERT INTO product_review_summary AS s
+        (product_id, n_reviews, stars_sum, stars_1, stars_2, stars_3, stars_4, stars_5, updated_at)
+    SELECT d.product_id,
+           sum(d.sign),
+           sum(d.sign * d.stars),
+           coalesce(sum(d.sign) FILTER (WHERE d.bucket = 1), 0),
+           coalesce(sum(d.sign) FILTER (WHERE d.bucket = 2), 0),
+           coalesce(sum(d.sign) FILTER (WHERE d.bucket = 3), 0),
+           coalesce(sum(d.sign) FILTER (WHERE d.bucket = 4), 0),
+           coalesce(sum(d.sign) FILTER (WHERE d.bucket = 5), 0),
+           now()
+    FROM (
+        SELECT u.product_id, u.stars, u.sign, review_star_bucket(u.stars) AS bucket
+        FROM unnest(ids, star_values, signs) AS u (product_id, stars, sign)
+    ) d
+    -- Al borrar un producto sus reseñas se borran en cascada: no hay nada que resumir
+    WHERE EXISTS (SELECT 1 FROM products_v2 p WHERE p.id = d.product_id)
+    GROUP BY d.product_id
+    ON CONFLICT (product_id) DO UPDATE SET
+        n_reviews = s.n_reviews + EXCLUDED.n_reviews,
+        stars_sum = s.stars_sum + EXCLUDED.stars_sum,
+        stars_1 = s.stars_1 + EXCLUDED.stars_1,
+        stars_2 = s.stars_2 + EXCLUDED.stars_2,
+        stars_3 = s.stars_3 + EXCLUDED.stars_3,
+        stars_4 = s.stars_4 + EXCLUDED.stars_4,
+        stars_5 = s.stars_5 + EXCLUDED.stars_5,
+        updated_at = EXCLUDED.updated_at;
+
+    DELETE FROM product_review_summary WHERE product_id = ANY(ids) AND n_reviews <= 0;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION reviews_summary_insert() RETURNS trigger AS $$
+BEGIN
+    PERFORM apply_review_deltas(array_agg(product_id), array_agg(stars), array_agg(1)) FROM new_rows;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION reviews_summary_update() RETURNS trigger AS $$
+BEGIN
+    PERFORM apply_review_deltas(array_agg(product_id), array_agg(stars), array_agg(sign))
+    FROM (
+        SELECT product_id, stars, -1 AS sign FROM old_rows
+        UNION ALL
+        SELECT product_id, stars, 1 FROM new_rows
+    ) d;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION reviews_summary_delete() RETURNS trigger AS $$
+BEGIN
+    PERFORM apply_review_deltas(array_agg(product_id), array_agg(stars), array_agg(-1)) FROM old_rows;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS reviews_summary_insert ON reviews;
+CREATE TRIGGER reviews_summary_insert AFTER INSERT ON reviews
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION reviews_summary_insert();
+
+DROP TRIGGER IF EXISTS reviews_summary_update ON reviews;
+CREATE TRIGGER reviews_summary_update AFTER UPDATE ON reviews
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION reviews_summary_update();
+
+DROP TRIGGER IF EXISTS reviews_summary_delete ON reviews;
+CREATE TRIGGER reviews_summary_delete AFTER DELETE ON reviews
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION reviews_summary_delete();
+
+-- Carga inicial con las reseñas existentes
+TRUNCATE product_review_summary;
+INSERT INTO product_review_summary
+    (product_id, n_reviews, stars_sum, stars_1, stars_2, stars_3, stars_4, stars_5)
+SELECT product_id, count(*), sum(stars),
+       count(*) FILTER (WHERE review_star_bucket(stars) = 1),
+       count(*) FILTER (WHERE review_star_bucket(stars) = 2),
+       count(*) FILTER (WHERE review_star_bucket(stars) = 3),
+       count(*) FILTER (WHERE review_star_bucket(stars) = 4),
+       count(*) FILTER (WHERE review_star_bucket(stars) = 5)
+FROM reviews
+GROUP BY product_id;
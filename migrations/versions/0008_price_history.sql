@@ -0,0 +1,65 @@
+-- Histórico de precios: cada alta o cambio de precio en prices_v2 añade una
+-- fila a price_history desde un trigger, en la misma transacción que la
+-- escritura (PUT, upsert, cargas masivas...). La tabla es de solo inserción y
+-- no tiene clave foránea para conservar el histórico de productos borrados.
+
+CREATE TABLE IF NOT EXISTS price_history (
+    id bigint GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
+    id_product uuid NOT NULL,
+    status integer NOT NULL,
+    price numeric(10, 2) NOT NULL,
+    changed_at timestamptz NOT NULL DEFAULT now()
+);
+
+-- GET /prices/history: rango de fechas de un producto con index-only scan
+CREATE INDEX IF NOT EXISTS price_history_product_idx
+    ON price_history (id_product, status, changed_at) INCLUDE (price);
+
+-- Consultas por fecha sobre todos los productos (auditoría, retención)
+CREATE INDEX IF NOT EXISTS price_history_changed_at_brin
+    ON price_history USING brin (changed_at);
+
+CREATE OR REPLACE FUNCTION prices_v2_history_insert() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO price_history (id_product, status, price)
+    SELECT id_product, status, price FROM new_rows;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION prices_v2_history_update() RETURNS trigger AS $$
+BEGIN
+    -- Solo los cambios reales (un upsert con el mismo precio no deja rastro)
+    INSERT INTO price_history (id_product, status, price)
+    SELECT n.id_product, n.status, n.price
+    FROM new_rows n
+    JOIN old_rows o ON o.id = n.id
+    WHERE (n.id_product, n.status, n.price) IS DISTINCT FROM (o.id_product, o.status, o.price);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS prices_v2_history_insert ON prices_v2;
+CREATE TRIGGER prices_v2_history_insert AFTER INSERT ON prices_v2
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION prices_v2_history_insert();
+
+DROP TRIGGER IF EXISTS prices_v2_history_update ON prices_v2;
+CREATE TRIGGER prices_v2_history_update AFTER UPDATE ON prices_v2
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION prices_v2_history_update();
+
+-- Solo inserción: UPDATE y DELETE no se permiten (TRUNCATE sí, para las semillas locales)
+CREATE OR REPLACE FUNCTION price_history_append_only() RETURNS trigger AS $$
+BEGIN
+    RAISE EXCEPTION 'price_history es de solo inserción';
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS price_history_append_only ON price_history;
+CREATE TRIGGER price_history_append_only BEFORE UPDATE OR DELETE ON price_history
+    FOR EACH STATEMENT EXECUTE FUNCTION price_history_append_only();
+
+-- Punto de partida: los precios actuales
+INSERT INTO price_history (id_product, status, price)
+SELECT id_product, status, price FROM prices_v2;
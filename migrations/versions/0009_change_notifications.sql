@@ -0,0 +1,72 @@
+-- Avisos de cambios para los workers (ver notifications.py): cada sentencia que
+-- escribe en las tablas del catálogo hace NOTIFY en el canal catalog_changes
+-- con la tabla y los ids afectados. Postgres entrega el aviso al confirmar la
+-- transacción, así que nadie se entera de cambios que luego se deshacen.
+--
+-- Carga útil: {"table": "<tabla>", "ids": ["<id>", ...]}. Si no cabe en el
+-- límite de NOTIFY (o en un TRUNCATE) se envía "ids": null, que significa
+-- "puede haber cambiado cualquier fila".
+
+CREATE OR REPLACE FUNCTION notify_catalog_change() RETURNS trigger AS $$
+DECLARE
+    -- TG_ARGV[0]: columna con el id que interesa a los workers
+    ids text[];
+    more text[];
+    payload text;
+BEGIN
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        EXECUTE format('SELECT array_agg(DISTINCT %I::text) FROM new_rows', TG_ARGV[0]) INTO ids;
+    END IF;
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        EXECUTE format('SELECT array_agg(DISTINCT %I::text) FROM old_rows', TG_ARGV[0]) INTO more;
+        ids := ARRAY(SELECT DISTINCT unnest(coalesce(ids, '{}') || coalesce(more, '{}')));
+    END IF;
+
+    IF TG_OP <> 'TRUNCATE' AND coalesce(cardinality(ids), 0) = 0 THEN
+        RETURN NULL;
+    END IF;
+
+    payload := json_build_object('table', TG_TABLE_NAME, 'ids', ids)::text;
+    IF TG_OP = 'TRUNCATE' OR octet_length(payload) > 7900 THEN
+        payload := json_build_object('table', TG_TABLE_NAME, 'ids', NULL)::text;
+    END IF;
+    PERFORM pg_notify('catalog_changes', payload);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DO $$
+DECLARE
+    t record;
+BEGIN
+    FOR t IN SELECT * FROM (VALUES
+        ('prices_v2', 'id_product'),
+        ('products_v2', 'id'),
+        ('brands_v2', 'id'),
+        ('categories', 'id'),
+        ('phone_status', 'id')
+    ) AS v (table_name, id_column) LOOP
+        -- Las tablas de transición exigen un trigger por evento
+        EXECUTE format('DROP TRIGGER IF EXISTS %I_notify_insert ON %I', t.table_name, t.table_name);
+        EXECUTE format(
+            'CREATE TRIGGER %I_notify_insert AFTER INSERT ON %I REFERENCING NEW TABLE AS new_rows '
+            'FOR EACH STATEMENT EXECUTE FUNCTION notify_catalog_change(%L)', t.table_name, t.table_name, t.id_column
+        );
+        EXECUTE format('DROP TRIGGER IF EXISTS %I_notify_update ON %I', t.table_name, t.table_name);
+        EXECUTE format(
+            'CREATE TRIGGER %I_notify_update AFTER UPDATE ON %I REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows '
+            'FOR EACH STATEMENT EXECUTE FUNCTION notify_catalog_change(%L)', t.table_name, t.table_name, t.id_column
+        );
+        EXECUTE format('DROP TRIGGER IF EXISTS %I_notify_delete ON %I', t.table_name, t.table_name);
+        EXECUTE format(
+            'CREATE TRIGGER %I_notify_delete AFTER DELETE ON %I REFERENCING OLD TABLE AS old_rows '
+            'FOR EACH STATEMENT EXECUTE FUNCTION notify_catalog_change(%L)', t.table_name, t.table_name, t.id_column
+        );
+        EXECUTE format('DROP TRIGGER IF EXISTS %I_notify_truncate ON %I', t.table_name, t.table_name);
+        EXECUTE format(
+            'CREATE TRIGGER %I_notify_truncate AFTER TRUNCATE ON %I '
+            'FOR EACH STATEMENT EXECUTE FUNCTION notify_catalog_change(%L)', t.table_name, t.table_name, t.id_column
+        );
+    END LOOP;
+END;
+$$;
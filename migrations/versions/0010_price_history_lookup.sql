@@ -0,0 +1,9 @@
+-- GET /prices/history lee el histórico estado a estado (ver routes/prices.py):
+-- para cada estado, los cambios del rango y el último cambio anterior al rango.
+-- Con id en la clave, "el último anterior" es un único paso por el índice
+-- (changed_at DESC, id DESC LIMIT 1) aunque varios cambios compartan instante.
+
+CREATE INDEX IF NOT EXISTS price_history_product_status_idx
+    ON price_history (id_product, status, changed_at, id) INCLUDE (price);
+
+DROP INDEX IF EXISTS price_history_product_idx;
@@ -0,0 +1,46 @@
+-- Versiones de tabla sin un contador compartido (sustituye al esquema de 0003).
+-- Con una sola fila por tabla, cada sentencia que escribía bloqueaba esa fila
+-- hasta confirmar: las escrituras en una tabla iban de una en una y una carga
+-- masiva larga paraba todos los PUT /prices y /prices/upsert.
+--
+-- Ahora cada backend incrementa su propia fila (table_name, backend_pid) y la
+-- versión de la tabla es la suma. Un backend ejecuta una sola transacción cada
+-- vez, así que dos escritores nunca comparten fila. La suma solo crece y cambia
+-- al confirmar, como antes. Coste: una fila por tabla y backend que ha escrito;
+-- compact_table_versions() suma en la fila base (backend_pid 0) las de los
+-- backends que ya no existen (se puede programar, p. ej. con pg_cron).
+
+ALTER TABLE table_versions ADD COLUMN IF NOT EXISTS backend_pid integer NOT NULL DEFAULT 0;
+ALTER TABLE table_versions DROP CONSTRAINT IF EXISTS table_versions_pkey;
+ALTER TABLE table_versions ADD PRIMARY KEY (table_name, backend_pid) INCLUDE (version);
+
+CREATE OR REPLACE FUNCTION bump_table_version() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO table_versions (table_name, backend_pid, version) VALUES (TG_TABLE_NAME, pg_backend_pid(), 1)
+    ON CONFLICT (table_name, backend_pid) DO UPDATE SET version = table_versions.version + 1;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION compact_table_versions() RETURNS integer AS $$
+DECLARE
+    folded integer;
+BEGIN
+    WITH gone AS (
+        DELETE FROM table_versions v
+        WHERE v.backend_pid <> 0
+          AND NOT EXISTS (SELECT 1 FROM pg_stat_activity a WHERE a.pid = v.backend_pid)
+        RETURNING table_name, version
+    ),
+    totals AS (
+        SELECT table_name, sum(version) AS version, count(*) AS n FROM gone GROUP BY table_name
+    ),
+    base AS (
+        INSERT INTO table_versions (table_name, backend_pid, version)
+        SELECT table_name, 0, version FROM totals
+        ON CONFLICT (table_name, backend_pid) DO UPDATE SET version = table_versions.version + EXCLUDED.version
+    )
+    SELECT coalesce(sum(n), 0) INTO folded FROM totals;
+    RETURN folded;
+END;
+$$ LANGUAGE plpgsql;
@@ -0,0 +1,40 @@
+-- refresh_product_price_summary (0005) recalcula el resumen leyendo prices_v2.
+-- Dos transacciones que escriben precios del mismo producto a la vez no ven
+-- la fila sin confirmar de la otra: la segunda en escribir el resumen lo hacía
+-- con su lectura antigua y perdía la variante de la primera.
+--
+-- Ahora se bloquean antes las filas de los productos afectados (en orden de id,
+-- para no provocar interbloqueos). La segunda transacción espera a que la
+-- primera confirme y su lectura siguiente ya incluye esa variante. FOR NO KEY
+-- UPDATE no choca con el FOR KEY SHARE que toman las claves foráneas al
+-- insertar precios, y los bloqueos de fila no ocupan la tabla de locks aunque
+-- una carga masiva toque miles de productos.
+
+CREATE OR REPLACE FUNCTION refresh_product_price_summary(ids uuid[]) RETURNS void AS $$
+BEGIN
+    PERFORM 1 FROM products_v2 WHERE id = ANY(ids) ORDER BY id FOR NO KEY UPDATE;
+
+    DELETE FROM product_price_summary s
+    WHERE s.id_product = ANY(ids)
+      AND NOT EXISTS (SELECT 1 FROM prices_v2 pr WHERE pr.id_product = s.id_product);
+
+    INSERT INTO product_price_summary (id_product, min_price, max_price, n_variants, best_by_status, updated_at)
+    SELECT id_product, min(price), max(price), count(*), jsonb_object_agg(status, price), now()
+    FROM (
+        SELECT DISTINCT ON (id_product, status) id_product, status, price
+        FROM prices_v2
+        WHERE id_product = ANY(ids)
+        ORDER BY id_product, status, price
+    ) best
+    GROUP BY id_product
+    ON CONFLICT (id_product) DO UPDATE SET
+        min_price = EXCLUDED.min_price,
+        max_price = EXCLUDED.max_price,
+        n_variants = EXCLUDED.n_variants,
+        best_by_status = EXCLUDED.best_by_status,
+        updated_at = EXCLUDED.updated_at;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Corregir los resúmenes que hayan podido quedar incompletos
+SELECT refresh_product_price_summary(ARRAY(SELECT DISTINCT id_product FROM prices_v2));
@@ -22,6 +22,26 @@ class Price(BaseModel):
     status: int
     price: float
 
+# Precio de un producto para un estado concreto
+class PriceVariant(BaseModel):
+    status: int
+    price: float
+
+# Todos los precios (por estado) de un producto
+class ProductPrices(BaseModel):
+    id_product: UUID
+    variants: list[PriceVariant]
+
+# Ids de productos para /products/batch
+class ProductBatch(BaseModel):
+    ids: list[UUID]
+
+# Fila de carga masiva de precios
+class BulkPrice(BaseModel):
+    id_product: UUID
+    status: int
+    price: float
+
 class Brand(BaseModel):
     id: Optional[int] = None
     marca: str
@@ -0,0 +1,192 @@
+# Avisos de cambios entre workers (LISTEN/NOTIFY, ver migrations/versions/0009).
+# Cada worker mantiene una conexión que escucha el canal catalog_changes:
+# - vacía las cachés locales de las tablas que han cambiado;
+# - reenvía los cambios de precios a los clientes de GET /prices/stream.
+
+import asyncio
+import json
+import logging
+import os
+import psycopg
+import database
+from cache import brands_cache, categories_cache, phone_status_cache
+
+logger = logging.getLogger("backmarket.notify")
+
+CHANNEL = "catalog_changes"
+
+# Conexión directa o de pooler en modo sesión para LISTEN: en modo transacción
+# (Supabase en el puerto 6543) el backend cambia y los avisos nunca llegan
+LISTEN_DSN = os.getenv("listen_dsn")
+
+# Espera entre reintentos de la conexión LISTEN
+RECONNECT_DELAY = float(os.getenv("listen_reconnect_delay", "2"))
+
+# Precios actuales de varios productos como JSON (lista vacía si no tiene)
+PRICES_QUERY = """
+    SELECT p.id_product::text, coalesce(json_agg(
+        json_build_object('status', pr.status, 'price', pr.price) ORDER BY pr.status
+    ) FILTER (WHERE pr.id IS NOT NULL), '[]')::text
+    FROM unnest(%s::uuid[]) AS p (id_product)
+    LEFT JOIN prices_v2 pr ON pr.id_product = p.id_product
+    GROUP BY p.id_product
+"""
+
+# Cachés locales que dependen de cada tabla
+TABLE_CACHES = {
+    "brands_v2": (brands_cache,),
+    "categories": (categories_cache,),
+    "phone_status": (phone_status_cache,),
+}
+
+
+class Topic:
+    """Último mensaje de un producto. Los suscriptores no tienen cola propia:
+    esperan al evento compartido y leen el mensaje más reciente."""
+
+    __slots__ = ("subscribers", "message", "seq", "changed")
+
+    def __init__(self):
+        self.subscribers = 0
+        self.message = None
+        self.seq = 0
+        self.changed = asyncio.Event()
+
+    def publish(self, message):
+        self.message = message
+        self.seq += 1
+        changed, self.changed = self.changed, asyncio.Event()
+        changed.set()
+
+
+async def fetch_prices(conn, product_ids):
+    cursor = await conn.execute(PRICES_QUERY, (list(product_ids),))
+    return await cursor.fetchall()
+
+
+class ChangeListener:
+    def __init__(self, conninfo, dedicated=True):
+        self.conninfo = conninfo
+        self.dedicated = dedicated  # conexión propia para LISTEN (listen_dsn)
+        self.topics = {}           # id_product -> Topic
+        self.connected = False
+        self.received = 0
+        self.reconnects = 0
+        self._task = None
+
+    # Ciclo de vida
+    def start(self):
+        if not self.dedicated:
+            logger.warning(
+                "Sin listen_dsn: LISTEN usa la conexión principal; detrás de un pooler en modo "
+                "transacción no llegarán avisos (cachés y /prices/stream sin actualizar)."
+            )
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                conn = await psycopg.AsyncConnection.connect(**self.conninfo, autocommit=True)
+            except Exception as e:
+                logger.warning("No se pudo abrir la conexión LISTEN: %s", e)
+                await asyncio.sleep(RECONNECT_DELAY)
+                continue
+            try:
+                await conn.execute(f"LISTEN {CHANNEL}")
+                self.connected = True
+                # Los avisos perdidos mientras no escuchábamos: todo puede haber cambiado
+                await self.invalidate_all()
+                async for notify in conn.notifies():
+                    self.received += 1
+                    await self.dispatch(notify.payload)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("Conexión LISTEN perdida: %s", e)
+            finally:
+                self.connected = False
+                await conn.close()
+            self.reconnects += 1
+            await asyncio.sleep(RECONNECT_DELAY)
+
+    async def dispatch(self, payload):
+        try:
+            change = json.loads(payload)
+            table, ids = change["table"], change["ids"]
+        except (ValueError, KeyError, TypeError):
+            logger.warning("Aviso no válido en %s: %s", CHANNEL, payload)
+            return
+
+        for cache in TABLE_CACHES.get(table, ()):
+            cache.clear()
+        if table == "prices_v2":
+            await self.publish_prices(self.topics if ids is None else [i for i in ids if i in self.topics])
+
+    async def invalidate_all(self):
+        for caches in TABLE_CACHES.values():
+            for cache in caches:
+                cache.clear()
+        await self.publish_prices(self.topics)
+
+    # Precios actuales de los productos con suscriptores, en una sola consulta
+    async def publish_prices(self, product_ids):
+        product_ids = list(product_ids)
+        if not product_ids:
+            return
+        try:
+            # Del primario: el aviso llega al confirmar y una réplica podría no tenerlo aún
+            async with database.get_db_connection() as conn:
+                rows = await fetch_prices(conn, product_ids)
+        except Exception as e:
+            logger.warning("No se pudieron leer los precios a publicar: %s", e)
+            return
+        for product_id, prices in rows:
+            topic = self.topics.get(product_id)
+            if topic is not None:
+                topic.publish(price_event(product_id, prices))
+
+    # Suscripciones de GET /prices/stream
+    def subscribe(self, product_id):
+        topic = self.topics.get(product_id)
+        if topic is None:
+            topic = self.topics[product_id] = Topic()
+        topic.subscribers += 1
+        return topic
+
+    def unsubscribe(self, product_id):
+        topic = self.topics.get(product_id)
+        if topic is not None:
+            topic.subscribers -= 1
+            if topic.subscribers <= 0:
+                del self.topics[product_id]
+
+    def stats(self):
+        return {
+            "connected": self.connected,
+            "dedicated": self.dedicated,
+            "received": self.received,
+            "reconnects": self.reconnects,
+            "topics": len(self.topics),
+            "subscribers": sum(t.subscribers for t in self.topics.values()),
+        }
+
+
+# Mensaje SSE con los precios de un producto (``prices`` ya es JSON)
+def price_event(product_id, prices):
+    return f'event: prices\ndata: {{"id_product":"{product_id}","prices":{prices}}}\n\n'.encode()
+
+
+# Oyente del worker (se arranca en el lifespan de main.py)
+listener = (
+    ChangeListener({"conninfo": LISTEN_DSN}) if LISTEN_DSN
+    else ChangeListener(database.DB_CONFIG, dedicated=False)
+)
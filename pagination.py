@@ -0,0 +1,55 @@
+import base64
+import json
+from uuid import UUID
+from fastapi import HTTPException, Query
+
+# Límites de paginación para los listados
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 500
+
+
+# Parámetros comunes de paginación por cursor (keyset)
+class Page:
+    def __init__(self, limit, cursor):
+        self.limit = limit
+        self.cursor = cursor
+        self.after = decode_cursor(cursor) if cursor else None
+
+    # Clave del cursor para listados ordenados por id (uuid)
+    def after_id(self):
+        if self.after is None:
+            return None
+        try:
+            return str(UUID(str(self.after)))
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Cursor no válido.")
+
+
+# Dependencia asíncrona para no pasar por el threadpool
+async def get_page(
+    limit: int = Query(DEFAULT_LIMIT, ge=1, le=MAX_LIMIT, alias="limit"),
+    cursor: str | None = Query(None, alias="cursor"),
+):
+    return Page(limit, cursor)
+
+
+# El cursor es opaco para el cliente: la clave del último elemento en base64
+def encode_cursor(key):
+    raw = json.dumps(key, default=str, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token):
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        return json.loads(raw)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Cursor no válido.")
+
+
+# Recortar las filas sobrantes (se piden limit + 1) y calcular el siguiente cursor
+def paginate(rows, limit, key):
+    if len(rows) > limit:
+        rows = rows[:limit]
+        return rows, encode_cursor(key(rows[-1]))
+    return rows, None
@@ -0,0 +1,139 @@
+import asyncio
+import logging
+import os
+import random
+import re
+import time
+from collections import deque
+from datetime import datetime, timezone
+import psycopg
+
+logger = logging.getLogger("backmarket.db")
+
+# Configuración del perfilado de consultas
+SLOW_QUERY_MS = float(os.getenv("slow_query_ms", "200"))
+EXPLAIN_SAMPLE_RATE = float(os.getenv("explain_sample_rate", "0.01"))
+QUERY_COUNT_WARN = int(os.getenv("query_count_warn", "20"))
+RING_SIZE = int(os.getenv("profiling_ring_size", "50"))
+
+# Últimos eventos, para consultarlos desde /admin/queries
+slow_queries = deque(maxlen=RING_SIZE)
+sampled_plans = deque(maxlen=RING_SIZE)
+query_storms = deque(maxlen=RING_SIZE)
+
+_explain_tasks = set()
+
+# EXPLAIN ANALYZE ejecuta la consulta: se descartan las que escriben o bloquean
+_WRITES = re.compile(r"\b(INSERT|UPDATE|DELETE|MERGE|COPY)\b|\bFOR\s+(UPDATE|SHARE)\b", re.IGNORECASE)
+
+# ...y las que llaman a funciones con efectos (locks, avisos, secuencias, esperas)
+_SIDE_EFFECTS = re.compile(
+    r"\b(pg_(try_)?advisory_\w+|pg_notify|nextval|setval|set_config|pg_sleep\w*"
+    r"|pg_(cancel|terminate)_backend|pg_current_xact_id|txid_current|lo_\w+|dblink\w*)\s*\(",
+    re.IGNORECASE
+)
+
+# Sin FROM no hay plan que ver (SELECT 1 de las comprobaciones, llamadas a funciones)
+_FROM = re.compile(r"\bFROM\b", re.IGNORECASE)
+
+
+def _explainable(text):
+    return (
+        text.lstrip().upper().startswith(("SELECT", "WITH"))
+        and _FROM.search(text) is not None
+        and not _WRITES.search(text)
+        and not _SIDE_EFFECTS.search(text)
+    )
+
+
+# Ocultar valores de los parámetros: solo tipo y tamaño
+def redact(params):
+    if params is None:
+        return None
+    if isinstance(params, dict):
+        return {key: redact_value(value) for key, value in params.items()}
+    return [redact_value(value) for value in params]
+
+
+def redact_value(value):
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    if isinstance(value, (str, bytes, list, tuple)):
+        return f"<{type(value).__name__}:{len(value)}>"
+    return f"<{type(value).__name__}>"
+
+
+def _now():
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _query_text(cursor, query):
+    return query if isinstance(query, str) else query.as_string(cursor.connection)
+
+
+# Texto en una sola línea para el log
+def _oneline(text):
+    return " ".join(text.split())
+
+
+# Llamado por metrics.InstrumentedCursor después de cada consulta
+def after_query(cursor, query, params, elapsed, route):
+    elapsed_ms = elapsed * 1000
+    if elapsed_ms >= SLOW_QUERY_MS:
+        text = _oneline(_query_text(cursor, query))
+        entry = {
+            "at": _now(), "route": route, "ms": round(elapsed_ms, 2),
+            "rows": cursor.rowcount, "query": text, "params": redact(params),
+        }
+        slow_queries.append(entry)
+        logger.warning("Consulta lenta (%.1f ms) en %s: %s params=%s filas=%s",
+                       elapsed_ms, route, text, entry["params"], cursor.rowcount)
+
+    if EXPLAIN_SAMPLE_RATE > 0 and not _explain_tasks and random.random() < EXPLAIN_SAMPLE_RATE:
+        text = _query_text(cursor, query)
+        # Solo se muestrean lecturas sin efectos
+        if _explainable(text):
+            task = asyncio.get_running_loop().create_task(_explain(text, params, route, elapsed_ms))
+            _explain_tasks.add(task)
+            task.add_done_callback(_explain_tasks.discard)
+
+
+# EXPLAIN (ANALYZE, BUFFERS) en segundo plano con otra conexión del pool
+async def _explain(text, params, route, elapsed_ms):
+    import database
+
+    try:
+        async with database.get_db_connection() as conn:
+            # Cursor sin instrumentar para no contar ni volver a muestrear el EXPLAIN
+            cursor = psycopg.AsyncCursor(conn)
+            start = time.perf_counter()
+            await cursor.execute("EXPLAIN (ANALYZE, BUFFERS) " + text, params)
+            plan = "\n".join(row[0] for row in await cursor.fetchall())
+        sampled_plans.append({
+            "at": _now(), "route": route, "ms": round(elapsed_ms, 2),
+            "explain_ms": round((time.perf_counter() - start) * 1000, 2),
+            "query": _oneline(text), "params": redact(params), "plan": plan,
+        })
+    except Exception as e:
+        logger.debug("No se pudo obtener el plan de %s: %s", text, e)
+
+
+# Llamado por metrics.MetricsMiddleware al terminar cada petición (detección de N+1)
+def after_request(route, queries, db_time):
+    if queries > QUERY_COUNT_WARN:
+        query_storms.append({"at": _now(), "route": route, "queries": queries, "db_ms": round(db_time * 1000, 2)})
+        logger.warning("Posible N+1: %s lanzó %d consultas (%.1f ms en la base de datos)",
+                       route, queries, db_time * 1000)
+
+
+def report():
+    return {
+        "config": {
+            "slow_query_ms": SLOW_QUERY_MS,
+            "explain_sample_rate": EXPLAIN_SAMPLE_RATE,
+            "query_count_warn": QUERY_COUNT_WARN,
+        },
+        "slow_queries": list(slow_queries),
+        "sampled_plans": list(sampled_plans),
+        "query_storms": list(query_storms),
+    }
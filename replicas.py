@@ -0,0 +1,215 @@
+# Réplicas de lectura: las lecturas pesadas (productos, precios, reseñas) van a
+# una réplica si su retraso está por debajo de ``replica_max_lag``; si no, al
+# primario. El retraso se mide contra posiciones del WAL leídas del primario,
+# así que una réplica desconectada (que no recibe WAL) también cuenta como
+# atrasada. Un cliente que acaba de escribir recibe una cookie y sus lecturas
+# siguientes solo van a réplicas que ya tengan esa escritura.
+#
+# Para probar en local sin réplica real se puede apuntar ``replica_dsns`` al
+# propio primario y simular retraso con ``replica_simulated_lag``.
+
+import asyncio
+import collections
+import itertools
+import logging
+import time
+from contextvars import ContextVar
+
+logger = logging.getLogger("backmarket.db")
+
+# Cookie con el instante (epoch) de la última escritura del cliente
+LAST_WRITE_COOKIE = "last_write"
+
+# POST que solo leen (ids en el cuerpo): no marcan al cliente como escritor
+READ_ONLY_POSTS = {"/products/batch"}
+
+# Posición actual del WAL en el primario
+PRIMARY_LSN_QUERY = "SELECT pg_current_wal_lsn()::text"
+
+# Posición del WAL ya aplicada en una réplica (la actual si es un primario)
+REPLAY_LSN_QUERY = """
+    SELECT CASE WHEN pg_is_in_recovery() THEN pg_last_wal_replay_lsn() ELSE pg_current_wal_lsn() END::text
+"""
+
+
+# "16/B374D848" -> entero comparable
+def _lsn(text):
+    high, _, low = text.partition("/")
+    return (int(high, 16) << 32) + int(low, 16)
+
+# Última escritura del cliente de la petición en curso
+last_write: ContextVar[float | None] = ContextVar("last_write", default=None)
+
+
+class Replica:
+    def __init__(self, name, pool):
+        self.name = name
+        self.pool = pool
+        self.lag = None         # None: desconocido o caída
+        self.checked_at = None
+        self.served = 0
+
+    # La réplica contiene todo lo confirmado antes de este instante
+    @property
+    def synced_until(self):
+        return self.checked_at - self.lag
+
+    def stats(self):
+        return {
+            "name": self.name,
+            "lag": self.lag,
+            "checked_at": self.checked_at,
+            "served": self.served,
+            "pool": self.pool.stats(),
+        }
+
+
+class ReplicaSet:
+    """Réplicas de lectura con reparto ``round_robin`` o ``least_connections``."""
+
+    def __init__(self, replicas, primary=None, max_lag=5.0, balance="round_robin", check_interval=1.0,
+                 simulated_lag=0.0):
+        if balance not in ("round_robin", "least_connections"):
+            raise ValueError(f"Reparto de réplicas no válido: {balance}")
+        self.replicas = replicas
+        self.primary = primary
+        self.max_lag = max_lag
+        self.balance = balance
+        self.check_interval = check_interval
+        self.simulated_lag = simulated_lag
+        self._turn = itertools.count()
+        self._monitor = None
+        self.fallbacks = 0
+        # Muestras (instante, posición del WAL) del primario, de la más antigua a la más reciente
+        self._samples = collections.deque()
+
+    # Ciclo de vida
+    async def open(self):
+        for replica in self.replicas:
+            try:
+                await replica.pool.open()
+            except Exception as e:
+                logger.warning("No se pudo abrir la réplica %s: %s", replica.name, e)
+        await self.check()
+        if self.replicas:
+            self._monitor = asyncio.create_task(self._watch())
+
+    async def close(self, drain_timeout=0):
+        if self._monitor is not None:
+            self._monitor.cancel()
+            self._monitor = None
+        for replica in self.replicas:
+            await replica.pool.drain(drain_timeout)
+            await replica.pool.close()
+
+    # Medir el retraso de cada réplica: la réplica tiene todo lo confirmado en el
+    # primario hasta la muestra más reciente cuya posición ya ha aplicado. Si no
+    # ha llegado a ninguna muestra guardada el retraso es desconocido (None) y no
+    # recibe lecturas.
+    async def check(self):
+        if not self.replicas:
+            return
+        await self._sample_primary()
+        for replica in self.replicas:
+            try:
+                async with replica.pool.connection() as conn:
+                    cursor = await conn.execute(REPLAY_LSN_QUERY)
+                    replayed = _lsn((await cursor.fetchone())[0])
+                now = time.time()
+                synced = [at for at, lsn in self._samples if lsn <= replayed]
+                replica.lag = now - synced[-1] + self.simulated_lag if synced else None
+            except Exception as e:
+                if replica.lag is not None:
+                    logger.warning("Réplica %s no disponible: %s", replica.name, e)
+                replica.lag = None
+            replica.checked_at = time.time()
+
+    async def _sample_primary(self):
+        if self.primary is None:
+            return
+        try:
+            sampled_at = time.time()
+            async with self.primary.connection() as conn:
+                cursor = await conn.execute(PRIMARY_LSN_QUERY)
+                self._samples.append((sampled_at, _lsn((await cursor.fetchone())[0])))
+        except Exception as e:
+            logger.warning("No se pudo leer la posición del WAL del primario: %s", e)
+        # Basta con cubrir el retraso máximo admitido: más allá la réplica ya no se usa
+        keep_after = time.time() - self.max_lag - 2 * self.check_interval
+        while len(self._samples) > 1 and self._samples[1][0] < keep_after:
+            self._samples.popleft()
+
+    async def _watch(self):
+        while True:
+            await asyncio.sleep(self.check_interval)
+            await self.check()
+
+    # Réplica para una lectura, o None para leer del primario
+    def choose(self):
+        written_at = last_write.get()
+        candidates = [
+            r for r in self.replicas
+            if r.lag is not None and r.lag <= self.max_lag
+            and (written_at is None or written_at < r.synced_until)
+        ]
+        if not candidates:
+            if self.replicas:
+                self.fallbacks += 1
+            return None
+        if self.balance == "least_connections":
+            replica = min(candidates, key=lambda r: r.pool.stats()["in_use"])
+        else:
+            replica = candidates[next(self._turn) % len(candidates)]
+        replica.served += 1
+        return replica
+
+    def stats(self):
+        return {
+            "max_lag": self.max_lag,
+            "balance": self.balance,
+            "primary_fallbacks": self.fallbacks,
+            "replicas": [r.stats() for r in self.replicas],
+        }
+
+
+def _cookie(scope, name):
+    for key, value in scope.get("headers", []):
+        if key == b"cookie":
+            for part in value.decode("latin-1").split(";"):
+                k, _, v = part.strip().partition("=")
+                if k == name:
+                    return v
+    return None
+
+
+class ReadYourWritesMiddleware:
+    """Middleware ASGI: marca con una cookie a los clientes que escriben y
+    expone esa marca a ``ReplicaSet.choose`` durante sus peticiones."""
+
+    def __init__(self, app, replica_set, window=30):
+        self.app = app
+        self.replica_set = replica_set
+        self.window = window
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.replica_set.replicas:
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            written_at = float(_cookie(scope, LAST_WRITE_COOKIE) or "")
+        except ValueError:
+            written_at = None
+        token = last_write.set(written_at)
+        writes = scope["method"] not in ("GET", "HEAD", "OPTIONS") and scope["path"] not in READ_ONLY_POSTS
+
+        async def send_wrapper(message):
+            if writes and message["type"] == "http.response.start" and message["status"] < 400:
+                cookie = f"{LAST_WRITE_COOKIE}={time.time():.3f}; Max-Age={self.window}; Path=/; HttpOnly; SameSite=Lax"
+                message = {**message, "headers": [*message.get("headers", []), (b"set-cookie", cookie.encode())]}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            last_write.reset(token)
@@ -0,0 +1,35 @@
+from decimal import Decimal
+import orjson
+from fastapi.responses import JSONResponse, Response
+
+
+def _orjson_default(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError
+
+
+def dumps(content):
+    return orjson.dumps(content, default=_orjson_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+# Respuesta JSON serializada con orjson (clase por defecto de la app)
+class ORJSONResponse(JSONResponse):
+    def render(self, content) -> bytes:
+        return dumps(content)
+
+
+# Envoltorio {"error","message","data"} con "data" ya serializado (p. ej. por Postgres)
+def raw_envelope(data_json, message="OK", headers=None, **extra):
+    if isinstance(data_json, str):
+        data_json = data_json.encode()
+    body = b'{"error":false,"message":' + dumps(message) + b',"data":' + data_json
+    for key, value in extra.items():
+        body += b"," + dumps(key) + b":" + dumps(value)
+    body += b"}"
+    return Response(body, media_type="application/json", headers=headers)
+
+
+# Lista JSON a partir de filas que ya vienen como texto JSON desde Postgres
+def json_array(rows):
+    return "[" + ",".join(rows) + "]"
@@ -0,0 +1,56 @@
+from fastapi import APIRouter
+import database
+import profiling
+from cache import caches
+from notifications import listener
+
+router = APIRouter(prefix="/admin", tags=["Administración"])
+
+# Estadísticas del pool de conexiones
+@router.get("/pool", status_code=200)
+async def get_pool_stats():
+    return {
+        "error": False,
+        "message": "OK",
+        "data": database.pool.stats()
+    }
+
+
+# Estadísticas de las cachés en memoria del worker
+@router.get("/cache", status_code=200)
+async def get_cache_stats():
+    return {
+        "error": False,
+        "message": "OK",
+        "data": [cache.stats() for cache in caches.values()]
+    }
+
+
+# Consultas lentas, planes muestreados y posibles N+1 del worker
+@router.get("/queries", status_code=200)
+async def get_query_profile():
+    return {
+        "error": False,
+        "message": "OK",
+        "data": profiling.report()
+    }
+
+
+# Réplicas de lectura: retraso, peticiones servidas y estado de sus pools
+@router.get("/replicas", status_code=200)
+async def get_replica_stats():
+    return {
+        "error": False,
+        "message": "OK",
+        "data": database.replica_set.stats()
+    }
+
+
+# Conexión LISTEN del worker y suscriptores de /prices/stream
+@router.get("/notifications", status_code=200)
+async def get_notification_stats():
+    return {
+        "error": False,
+        "message": "OK",
+        "data": listener.stats()
+    }
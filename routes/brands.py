@@ -1,6 +1,8 @@
-from fastapi import APIRouter, HTTPException, Query
-from psycopg2.extras import RealDictCursor
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from psycopg.rows import dict_row
 from database import get_db_connection
+from cache import brands_cache, make_key
+from etag import resource_etag, etag_matches, not_modified
 from models import Brand
 from uuid import UUID
 
@@ -11,39 +13,57 @@ router = APIRouter(prefix="/brands", tags=["Marcas"])
     404: {"description": "Marca no encontrada."},
     500: {"description": "Error interno del servidor."}
 })
-def get_brands(category: int | None = Query(None, alias="category")):
-    conn = get_db_connection()
-    cursor = conn.cursor()
-
-    try:
-        if category:
-            cursor.execute("SELECT id, marca, img_header FROM brands_v2 WHERE category = %s", (str(category),))
-            brands = cursor.fetchall()
-            if brands:
-                return {
-                    "error": False,
-                    "message": "OK",
-                    "data": [
-                        {"id": p[0], "marca": p[1], "img_header": p[2]}
-                        for p in brands
-                    ]
-                }
-            raise HTTPException(status_code=404, detail="Marca no encontrada.")
-
-        cursor.execute("SELECT id, marca, img_header FROM brands_v2")
-        brands = cursor.fetchall()
-        return {
-            "error": False,
-            "message": "OK",
-            "data": [
-                {"id": p[0], "marca": p[1], "img_header": p[2]}
-                for p in brands
-            ]
-        }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        conn.close()
+async def get_brands(request: Request, response: Response, category: int | None = Query(None, alias="category")):
+    key = make_key("brands", category=category)
+    cached = brands_cache.get(key)
+    if cached is not None:
+        etag, body = cached
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        response.headers["ETag"] = etag
+        return body
+
+    async with get_db_connection() as conn:
+        cursor = conn.cursor()
+
+        try:
+            # Versión de las tablas: si el cliente ya la tiene, 304 sin consultar datos
+            etag = await resource_etag(cursor, "brands", request)
+            if etag_matches(request, etag):
+                return not_modified(etag)
+
+            if category:
+                await cursor.execute("SELECT id, marca, img_header FROM brands_v2 WHERE category = %s", (str(category),))
+                brands = await cursor.fetchall()
+                if brands:
+                    body = {
+                        "error": False,
+                        "message": "OK",
+                        "data": [
+                            {"id": p[0], "marca": p[1], "img_header": p[2]}
+                            for p in brands
+                        ]
+                    }
+                    brands_cache.set(key, (etag, body))
+                    response.headers["ETag"] = etag
+                    return body
+                raise HTTPException(status_code=404, detail="Marca no encontrada.")
+
+            await cursor.execute("SELECT id, marca, img_header FROM brands_v2")
+            brands = await cursor.fetchall()
+            body = {
+                "error": False,
+                "message": "OK",
+                "data": [
+                    {"id": p[0], "marca": p[1], "img_header": p[2]}
+                    for p in brands
+                ]
+            }
+            brands_cache.set(key, (etag, body))
+            response.headers["ETag"] = etag
+            return body
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
 
 
 # Crear una marca
@@ -51,69 +71,67 @@ def get_brands(category: int | None = Query(None, alias="category")):
     424: {"description": "Error de validación."},
     500: {"description": "Error interno del servidor."}
 })
-def create_brand(brand: Brand):
-    conn = get_db_connection()
-    cursor = conn.cursor(cursor_factory=RealDictCursor)
-
-    try:
-        query = "INSERT INTO brands_v2 (marca) VALUES (%s) RETURNING id"
-        cursor.execute(query, (brand.marca,))
-        new_id = cursor.fetchone()["id"]  # Obtener el ID generado por la BD
-        conn.commit()
-
-        return {
-            "error": False,
-            "message": "Marca creada correctamente",
-            "data": {"id": new_id, "marca": brand.marca}
-        }
-    except Exception as e:
-        conn.rollback()
-        raise HTTPException(status_code=500, detail="Error al crear marca: " + str(e))
-    finally:
-        conn.close()
+async def create_brand(brand: Brand):
+    async with get_db_connection() as conn:
+        cursor = conn.cursor(row_factory=dict_row)
+
+        try:
+            query = "INSERT INTO brands_v2 (marca) VALUES (%s) RETURNING id"
+            await cursor.execute(query, (brand.marca,))
+            new_id = (await cursor.fetchone())["id"]  # Obtener el ID generado por la BD
+            await conn.commit()
+            brands_cache.clear()
+
+            return {
+                "error": False,
+                "message": "Marca creada correctamente",
+                "data": {"id": new_id, "marca": brand.marca}
+            }
+        except Exception as e:
+            await conn.rollback()
+            raise HTTPException(status_code=500, detail="Error al crear marca: " + str(e))
 
 # Actualizar una marca por ID
 @router.put("", status_code=200, responses={
     404: {"description": "Marca no encontrada."},
     500: {"description": "Error interno del servidor."}
 })
-def update_brand(id: int = Query(..., alias="id"), brand: Brand = None):
-    conn = get_db_connection()
-    cursor = conn.cursor()
-
-    try:
-        # Verificar si la marca existe
-        cursor.execute("SELECT 1 FROM brands_v2 WHERE id = %s", (str(id),))
-        if cursor.fetchone() is None:
-            # Si la marca no existe, lanzar error 404
-            raise HTTPException(status_code=404, detail="Marca no encontrada.")
-
-        # Proceder con la actualización de la marca
-        query = """
-            UPDATE brands_v2 
-            SET marca = %s
-            WHERE id = %s
-        """
-        values = (brand.marca, str(id))
-        cursor.execute(query, values)
-        conn.commit()
-
-        # Verificar si la actualización afectó alguna fila
-        if cursor.rowcount == 0:
-            # Si no se afectó ninguna fila, lanzar error 404
-            raise HTTPException(status_code=404, detail="Marca no encontrada.")
-
-        return {"error": False, "message": "Marca actualizada correctamente.", "data": None}
-
-    except HTTPException as http_error:
-        # Capturar la excepción HTTPException para que el estado 404 sea manejado adecuadamente
-        raise http_error
-    except Exception as e:
-        conn.rollback()
-        raise HTTPException(status_code=500, detail="Error interno del servidor.")
-
-    finally:
-        conn.close()
+async def update_brand(id: int = Query(..., alias="id"), brand: Brand = None):
+    async with get_db_connection() as conn:
+        cursor = conn.cursor()
+
+        try:
+            # Verificar si la marca existe
+            await cursor.execute("SELECT 1 FROM brands_v2 WHERE id = %s", (str(id),))
+            if await cursor.fetchone() is None:
+                # Si la marca no existe, lanzar error 404
+                raise HTTPException(status_code=404, detail="Marca no encontrada.")
+
+            # Proceder con la actualización de la marca
+            query = """
+                UPDATE brands_v2 
+                SET marca = %s
+                WHERE id = %s
+            """
+            values = (brand.marca, str(id))
+            await cursor.execute(query, values)
+            await conn.commit()
+            brands_cache.clear()
+
+            # Verificar si la actualización afectó alguna fila
+            if cursor.rowcount == 0:
+                # Si no se afectó ninguna fila, lanzar error 404
+                raise HTTPException(status_code=404, detail="Marca no encontrada.")
+
+            return {"error": False, "message": "Marca actualizada correctamente.", "data": None}
+
+        except HTTPException as http_error:
+            # Capturar la excepción HTTPException para que el estado 404 sea manejado adecuadamente
+            raise http_error
+        except Exception as e:
+            await conn.rollback()
+            raise HTTPException(status_code=500, detail="Error interno del servidor.")
+
 
 
 
@@ -122,18 +140,17 @@ def update_brand(id: int = Query(..., alias="id"), brand: Brand = None):
     404: {"description": "Marca no encontrada."},
     500: {"description": "Error interno del servidor."}
 })
-def delete_brand(id: int = Query(..., alias="id")):
-    conn = get_db_connection()
-    cursor = conn.cursor()
-
-    try:
-        cursor.execute("DELETE FROM brands_v2 WHERE id = %s", (str(id),))
-        conn.commit()
-        if cursor.rowcount == 0:
-            raise HTTPException(status_code=404, detail="Marca no encontrada.")
-        return {"error": False, "message": "Marca eliminada correctamente.", "data": None}
-    except Exception as e:
-        conn.rollback()
-        raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        conn.close()
\ No newline at end of file
+async def delete_brand(id: int = Query(..., alias="id")):
+    async with get_db_connection() as conn:
+        cursor = conn.cursor()
+
+        try:
+            await cursor.execute("DELETE FROM brands_v2 WHERE id = %s", (str(id),))
+            await conn.commit()
+            brands_cache.clear()
+            if cursor.rowcount == 0:
+                raise HTTPException(status_code=404, detail="Marca no encontrada.")
+            return {"error": False, "message": "Marca eliminada correctamente.", "data": None}
+        except Exception as e:
+            await conn.rollback()
+            raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
@@ -1,6 +1,7 @@
-from fastapi import APIRouter, HTTPException, Query
-from psycopg2.extras import RealDictCursor
+from fastapi import APIRouter, HTTPException, Query, Request, Response
 from database import get_db_connection
+from cache import categories_cache, make_key
+from etag import resource_etag, etag_matches, not_modified
 from models import Category
 from uuid import UUID
 
@@ -11,33 +12,51 @@ router = APIRouter(prefix="/categories", tags=["Categorias"])
     404: {"description": "Categoria no encontrada."},
     500: {"description": "Error interno del servidor."}
 })
-def get_categories(id: int | None = Query(None, alias="id")):
-    conn = get_db_connection()
-    cursor = conn.cursor()
+async def get_categories(request: Request, response: Response, id: int | None = Query(None, alias="id")):
+    key = make_key("categories", id=id)
+    cached = categories_cache.get(key)
+    if cached is not None:
+        etag, body = cached
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        response.headers["ETag"] = etag
+        return body
 
-    try:
-        if id:
-            cursor.execute("SELECT * FROM categories WHERE id = %s", (str(id),))
-            category = cursor.fetchone()
-            if category:
-                return {
-                    "error": False,
-                    "message": "OK",
-                    "data": {"id": category[0], "name": category[1]}
-                }
-            raise HTTPException(status_code=404, detail="Categoria no encontrada.")
+    async with get_db_connection() as conn:
+        cursor = conn.cursor()
 
-        cursor.execute("SELECT * FROM categories")
-        categories = cursor.fetchall()
-        return {
-            "error": False,
-            "message": "OK",
-            "data": [
-                {"id": p[0], "name": p[1]}
-                for p in categories
-            ]
-        }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        conn.close()
\ No newline at end of file
+        try:
+            # Versión de las tablas: si el cliente ya la tiene, 304 sin consultar datos
+            etag = await resource_etag(cursor, "categories", request)
+            if etag_matches(request, etag):
+                return not_modified(etag)
+
+            if id:
+                await cursor.execute("SELECT * FROM categories WHERE id = %s", (str(id),))
+                category = await cursor.fetchone()
+                if category:
+                    body = {
+                        "error": False,
+                        "message": "OK",
+                        "data": {"id": category[0], "name": category[1]}
+                    }
+                    categories_cache.set(key, (etag, body))
+                    response.headers["ETag"] = etag
+                    return body
+                raise HTTPException(status_code=404, detail="Categoria no encontrada.")
+
+            await cursor.execute("SELECT * FROM categories")
+            categories = await cursor.fetchall()
+            body = {
+                "error": False,
+                "message": "OK",
+                "data": [
+                    {"id": p[0], "name": p[1]}
+                    for p in categories
+                ]
+            }
+            categories_cache.set(key, (etag, body))
+            response.headers["ETag"] = etag
+            return body
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
@@ -1,5 +1,7 @@
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Query, Request, Response
 from database import get_db_connection
+from cache import phone_status_cache, make_key
+from etag import resource_etag, etag_matches, not_modified
 from uuid import UUID
 
 router = APIRouter(prefix="/phone_status", tags=["Estados de venta"])
@@ -9,36 +11,54 @@ router = APIRouter(prefix="/phone_status", tags=["Estados de venta"])
     404: {"description": "Estado de venta no encontrado."},
     500: {"description": "Error interno del servidor."}
 })
-def get_status(id: int | None = Query(None, alias="id")):
-    conn = get_db_connection()
-    cursor = conn.cursor()
+async def get_status(request: Request, response: Response, id: int | None = Query(None, alias="id")):
+    key = make_key("phone_status", id=id)
+    cached = phone_status_cache.get(key)
+    if cached is not None:
+        etag, body = cached
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        response.headers["ETag"] = etag
+        return body
 
-    try:
-        if id:
-            cursor.execute("SELECT * FROM phone_status WHERE id = %s ORDER BY status_order", (str(id),))
-            phone_status = cursor.fetchall()
-            if phone_status:
-                return {
-                    "error": False,
-                    "message": "OK",
-                    "data": [
-                        {"id": p[0], "estado": p[1], "description": p[2], "screen_tags": p[3], "case_tags": p[4], "order": p[5]}
-                        for p in phone_status
-                    ]
-                }
-            raise HTTPException(status_code=404, detail="Estado de venta no encontrado.")
+    async with get_db_connection() as conn:
+        cursor = conn.cursor()
 
-        cursor.execute("SELECT * FROM phone_status ORDER BY status_order")
-        phone_status = cursor.fetchall()
-        return {
-            "error": False,
-            "message": "OK",
-            "data": [
-                {"id": p[0], "estado": p[1], "description": p[2], "screen_tags": p[3], "case_tags": p[4], "order": p[5]}
-                for p in phone_status
-            ]
-        }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        conn.close()
\ No newline at end of file
+        try:
+            # Versión de las tablas: si el cliente ya la tiene, 304 sin consultar datos
+            etag = await resource_etag(cursor, "phone_status", request)
+            if etag_matches(request, etag):
+                return not_modified(etag)
+
+            if id:
+                await cursor.execute("SELECT * FROM phone_status WHERE id = %s ORDER BY status_order", (str(id),))
+                phone_status = await cursor.fetchall()
+                if phone_status:
+                    body = {
+                        "error": False,
+                        "message": "OK",
+                        "data": [
+                            {"id": p[0], "estado": p[1], "description": p[2], "screen_tags": p[3], "case_tags": p[4], "order": p[5]}
+                            for p in phone_status
+                        ]
+                    }
+                    phone_status_cache.set(key, (etag, body))
+                    response.headers["ETag"] = etag
+                    return body
+                raise HTTPException(status_code=404, detail="Estado de venta no encontrado.")
+
+            await cursor.execute("SELECT * FROM phone_status ORDER BY status_order")
+            phone_status = await cursor.fetchall()
+            body = {
+                "error": False,
+                "message": "OK",
+                "data": [
+                    {"id": p[0], "estado": p[1], "description": p[2], "screen_tags": p[3], "case_tags": p[4], "order": p[5]}
+                    for p in phone_status
+                ]
+            }
+            phone_status_cache.set(key, (etag, body))
+            response.headers["ETag"] = etag
+            return body
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
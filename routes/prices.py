@@ -1,51 +1,265 @@
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
 from database import get_db_connection
-from models import Price
+from models import Price, BulkPrice, ProductPrices
+from pagination import Page, get_page, paginate
+from responses import json_array, raw_envelope
+from fields import parse_fields, json_object_sql
+from etag import resource_etag, etag_matches, not_modified
 from uuid import UUID
-from psycopg2 import errors
-import psycopg2.extras
+from datetime import datetime, timedelta, timezone
+from psycopg import errors
+from psycopg.rows import dict_row
+from notifications import listener, fetch_prices, price_event
+import asyncio
+import csv
+import io
+import os
+
+# Máximo de filas aceptadas en una carga masiva
+BULK_MAX_ROWS = 100_000
+
+# Agrupaciones de /prices/history y rango por defecto
+HISTORY_BUCKETS = ("day", "week")
+HISTORY_DEFAULT_RANGE = timedelta(days=365)
+
+# Comentario SSE periódico para que proxies y clientes no cierren la conexión
+STREAM_KEEPALIVE = float(os.getenv("sse_keepalive", "15"))
 
 router = APIRouter(prefix="/prices", tags=["Precios"])
 
+# Campos de precio que se pueden pedir con ?fields= y su expresión SQL
+PRICE_FIELDS = {
+    "id": "id",
+    "id_product": "id_product",
+    "status": "status",
+    "price": "price",
+}
+
 # Obtener todos los precios
 @router.get("", status_code=200, responses={
     404: {"description": "Precio no encontrado."},
     424: {"description": "Error de validación."},
     500: {"description": "Error interno del servidor."}
 })
-def get_prices(id: UUID | None = Query(None, alias="id")):
-    conn = get_db_connection()
-    cursor = conn.cursor()
+async def get_prices(
+    request: Request,
+    response: Response,
+    id: UUID | None = Query(None, alias="id"),
+    fields: str | None = Query(None, alias="fields"),  # Ej: "status,price"
+    page: Page = Depends(get_page)
+):
+    after = page.after_id()
+    price_json = json_object_sql(parse_fields(fields, PRICE_FIELDS), PRICE_FIELDS)
+
+    async with get_db_connection(read_only=True) as conn:
+        cursor = conn.cursor()
+
+        try:
+            # Versión de las tablas: si el cliente ya la tiene, 304 sin consultar datos
+            etag = await resource_etag(cursor, "prices", request)
+            if etag_matches(request, etag):
+                return not_modified(etag)
+            response.headers["ETag"] = etag
+
+            if id:
+                await cursor.execute(f"SELECT {price_json} FROM prices_v2 WHERE id_product = %s", (str(id),))
+                prices = await cursor.fetchall()
+                if prices:
+                    return raw_envelope(json_array(p[0] for p in prices), headers={"ETag": etag})
+                raise HTTPException(status_code=404, detail="Precio no encontrado.")
+
+            # Paginación por cursor sobre la clave primaria (Postgres construye el JSON)
+            query = f"SELECT id, {price_json} FROM prices_v2"
+            if after:
+                await cursor.execute(query + " WHERE id > %s ORDER BY id LIMIT %s", (after, page.limit + 1))
+            else:
+                await cursor.execute(query + " ORDER BY id LIMIT %s", (page.limit + 1,))
+            prices, next_cursor = paginate(await cursor.fetchall(), page.limit, key=lambda p: p[0])
+            return raw_envelope(
+                json_array(p[1] for p in prices),
+                headers={"ETag": etag},
+                next_cursor=next_cursor
+            )
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+
+
+# Inicio del periodo (día o semana, de lunes, en UTC como date_trunc) siguiente a ``moment``
+def history_period_end(moment, bucket):
+    start = moment.astimezone(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    if bucket == "week":
+        return start - timedelta(days=start.weekday()) + timedelta(weeks=1)
+    return start + timedelta(days=1)
+
+
+# Evolución de los precios de un producto (tabla price_history) agrupada por día o semana.
+# Por cada estado y periodo con cambios: mínimo, máximo y último precio. Los periodos
+# sin cambios se omiten: el precio sigue siendo el último del periodo anterior.
+@router.get("/history", status_code=200, responses={
+    400: {"description": "Parámetros no válidos."},
+    500: {"description": "Error interno del servidor."}
+})
+async def get_price_history(
+    request: Request,
+    response: Response,
+    id_product: UUID = Query(..., alias="id_product"),
+    status: int | None = Query(None, alias="status"),
+    date_from: datetime | None = Query(None, alias="from"),
+    date_to: datetime | None = Query(None, alias="to"),
+    bucket: str = Query("day", alias="bucket")
+):
+    if bucket not in HISTORY_BUCKETS:
+        raise HTTPException(status_code=400, detail="bucket debe ser day o week.")
+    # Fechas sin zona horaria: se interpretan en UTC
+    if date_from is not None and date_from.tzinfo is None:
+        date_from = date_from.replace(tzinfo=timezone.utc)
+    if date_to is not None and date_to.tzinfo is None:
+        date_to = date_to.replace(tzinfo=timezone.utc)
+    # Sin ?to= el rango acaba al final del periodo actual (no hay cambios futuros,
+    # así que el resultado es el mismo que hasta ahora) y no se mueve con cada
+    # petición: la ETag lleva el rango resuelto y cambia al empezar otro periodo
+    date_to = date_to or history_period_end(datetime.now(timezone.utc), bucket)
+    date_from = date_from or date_to - HISTORY_DEFAULT_RANGE
+    if date_from >= date_to:
+        raise HTTPException(status_code=400, detail="from debe ser anterior a to.")
+
+    async with get_db_connection(read_only=True) as conn:
+        cursor = conn.cursor()
 
+        try:
+            # El histórico solo cambia cuando cambia prices_v2
+            etag = await resource_etag(
+                cursor, "price_history", request, f"{date_from.isoformat()}|{date_to.isoformat()}"
+            )
+            if etag_matches(request, etag):
+                return not_modified(etag)
+            response.headers["ETag"] = etag
+
+            # Cambios del rango más el precio vigente al empezar, estado a estado por el
+            # índice (id_product, status, changed_at, id): el coste depende del rango
+            # pedido, no de todo el histórico del producto. Sin ?status= los estados
+            # del producto se recorren saltando por el índice (una búsqueda por estado).
+            # El mínimo y el máximo de cada periodo incluyen el precio con el que
+            # empieza, que es el último del anterior.
+            if status is not None:
+                statuses = "SELECT %(status)s::integer AS status"
+            else:
+                statuses = """
+                    WITH RECURSIVE s (status) AS (
+                        SELECT min(status) FROM price_history WHERE id_product = %(id_product)s
+                        UNION ALL
+                        SELECT (
+                            SELECT min(status) FROM price_history
+                            WHERE id_product = %(id_product)s AND status > s.status
+                        )
+                        FROM s WHERE s.status IS NOT NULL
+                    )
+                    SELECT status FROM s WHERE status IS NOT NULL
+                """
+            await cursor.execute(f"""
+                WITH statuses AS ({statuses}),
+                changes AS (
+                    SELECT s.status, h.changed_at, h.id, h.price
+                    FROM statuses s
+                    CROSS JOIN LATERAL (
+                        SELECT changed_at, id, price
+                        FROM price_history
+                        WHERE id_product = %(id_product)s AND status = s.status
+                          AND changed_at >= %(from)s AND changed_at < %(to)s
+                    ) h
+                    UNION ALL
+                    SELECT s.status, %(from)s, h.id, h.price
+                    FROM statuses s
+                    CROSS JOIN LATERAL (
+                        SELECT id, price
+                        FROM price_history
+                        WHERE id_product = %(id_product)s AND status = s.status
+                          AND changed_at < %(from)s
+                        ORDER BY changed_at DESC, id DESC
+                        LIMIT 1
+                    ) h
+                ),
+                buckets AS (
+                    SELECT status, date_trunc(%(bucket)s, changed_at) AS bucket,
+                           min(price) AS min_price, max(price) AS max_price,
+                           (array_agg(price ORDER BY changed_at DESC, id DESC))[1] AS last_price
+                    FROM changes
+                    GROUP BY 1, 2
+                )
+                SELECT json_build_object(
+                    'status', status,
+                    'bucket', bucket,
+                    'min', least(min_price, lag(last_price) OVER w),
+                    'max', greatest(max_price, lag(last_price) OVER w),
+                    'last', last_price
+                )::text
+                FROM buckets
+                WINDOW w AS (PARTITION BY status ORDER BY bucket)
+                ORDER BY status, bucket
+            """, {
+                "id_product": str(id_product), "status": status,
+                "from": date_from, "to": date_to, "bucket": bucket,
+            })
+            points = await cursor.fetchall()
+            return raw_envelope(json_array(p[0] for p in points), headers={"ETag": etag})
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+
+
+# Eventos SSE de un producto: precios actuales y después cada cambio
+async def price_stream(product_id):
+    topic = listener.subscribe(product_id)
+    seq = topic.seq
     try:
-        if id:
-            cursor.execute("SELECT * FROM prices_v2 WHERE id_product = %s", (str(id),))
-            prices = cursor.fetchall()
-            if prices:
-                return {
-                    "error": False,
-                    "message": "OK",
-                    "data": [
-                        {"id": p[0], "id_product": p[1], "status": p[2], "price": p[3]}
-                        for p in prices
-                    ]
-                }
-            raise HTTPException(status_code=404, detail="Precio no encontrado.")
-
-        cursor.execute("SELECT * FROM prices_v2")
-        prices = cursor.fetchall()
-        return {
-            "error": False,
-            "message": "OK",
-            "data": [
-                {"id": p[0], "id_product": p[1], "status": p[2], "price": p[3]}
-                for p in prices
-            ]
-        }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        async with get_db_connection() as conn:
+            rows = await fetch_prices(conn, [product_id])
+        yield b"retry: 5000\n\n" + price_event(*rows[0])
+
+        while True:
+            if topic.seq != seq:
+                seq = topic.seq
+                yield topic.message
+                continue
+            try:
+                async with asyncio.timeout(STREAM_KEEPALIVE):
+                    await topic.changed.wait()
+            except TimeoutError:
+                yield b": keepalive\n\n"
     finally:
-        conn.close()
+        listener.unsubscribe(product_id)
+
+
+# Precios en vivo de un producto (Server-Sent Events), en lugar de sondear /prices
+@router.get("/stream", status_code=200, response_class=StreamingResponse, responses={
+    404: {"description": "Producto no encontrado."},
+    500: {"description": "Error interno del servidor."}
+})
+async def stream_prices(id_product: UUID = Query(..., alias="id_product")):
+    async with get_db_connection() as conn:
+        cursor = conn.cursor()
+
+        try:
+            await cursor.execute("SELECT 1 FROM products_v2 WHERE id = %s", (str(id_product),))
+            exists = await cursor.fetchone()
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+
+    if exists is None:
+        raise HTTPException(status_code=404, detail="Producto no encontrado.")
+    return StreamingResponse(
+        price_stream(str(id_product)),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+# Mensaje de 424 según la clave foránea de prices_v2 que ha fallado
+def foreign_key_message(e):
+    if e.diag.constraint_name == "prices_v2_status_fkey":
+        return "El estado no existe."
+    return "El producto no existe."
 
 
 # Crear un precio
@@ -53,56 +267,214 @@ def get_prices(id: UUID | None = Query(None, alias="id")):
     424: {"description": "Error de validación."},
     500: {"description": "Error interno del servidor."}
 })
-def create_price(price: Price):
-    conn = get_db_connection()
-    cursor = conn.cursor(cursor_factory=psycopg2.extras.DictCursor)
+async def create_price(price: Price):
+    async with get_db_connection() as conn:
+        cursor = conn.cursor(row_factory=dict_row)
+
+        try:
+            # Insertar solo si no existe la combinación id_product/status (atómico, un viaje)
+            insert_query = """
+                INSERT INTO prices_v2 (id_product, status, price)
+                VALUES (%s, %s, %s)
+                ON CONFLICT (id_product, status) DO NOTHING
+                RETURNING id
+            """
+            values = (str(price.id_product), price.status, price.price)
+            await cursor.execute(insert_query, values)
+            created = await cursor.fetchone()
+
+            if created is None:
+                raise HTTPException(
+                    status_code=424,
+                    detail=f"Ya existe esa combinación de precios para ese producto."
+                )
+
+            new_id = created["id"]
+            await conn.commit()
+            price.id = new_id
+
+            return {
+                "error": False,
+                "message": "Precio creado correctamente.",
+                "data": {"id": new_id, "price": price}
+            }
 
+
+        except errors.ForeignKeyViolation as e:
+            await conn.rollback()
+            raise HTTPException(status_code=424, detail=foreign_key_message(e))
+
+        except HTTPException as e:
+            await conn.rollback()
+            raise e
+
+        except Exception as e:
+            await conn.rollback()
+            raise HTTPException(status_code=500, detail="Error al crear precio: " + str(e))
+
+
+
+
+# Crear o actualizar todos los precios de un producto en una sola sentencia
+@router.post("/upsert", status_code=200, responses={
+    424: {"description": "Error de validación."},
+    500: {"description": "Error interno del servidor."}
+})
+async def upsert_product_prices(prices: ProductPrices):
+    statuses = [variant.status for variant in prices.variants]
+    if not statuses:
+        raise HTTPException(status_code=424, detail="Debe indicar al menos un precio.")
+    if len(set(statuses)) != len(statuses):
+        raise HTTPException(status_code=424, detail="Hay estados repetidos en los precios.")
+
+    async with get_db_connection() as conn:
+        cursor = conn.cursor()
+
+        try:
+            await cursor.execute("""
+                INSERT INTO prices_v2 (id_product, status, price)
+                SELECT %s::uuid, v.status, v.price
+                FROM unnest(%s::integer[], %s::numeric[]) AS v(status, price)
+                ON CONFLICT (id_product, status) DO UPDATE SET price = EXCLUDED.price
+                RETURNING id, status, price, (xmax = 0) AS inserted
+            """, (str(prices.id_product), statuses, [variant.price for variant in prices.variants]))
+            written = await cursor.fetchall()
+            await conn.commit()
+
+            return {
+                "error": False,
+                "message": "Precios guardados correctamente.",
+                "data": [
+                    {
+                        "id": p[0], "id_product": prices.id_product, "status": p[1], "price": p[2],
+                        "result": "inserted" if p[3] else "updated"
+                    }
+                    for p in written
+                ]
+            }
+
+        except errors.ForeignKeyViolation as e:
+            await conn.rollback()
+            raise HTTPException(status_code=424, detail=foreign_key_message(e))
+
+        except Exception as e:
+            await conn.rollback()
+            raise HTTPException(status_code=500, detail="Error al guardar precios: " + str(e))
+
+
+# Leer las filas de la carga masiva (JSON o CSV) y validarlas una a una
+async def read_bulk_rows(request: Request):
+    content_type = request.headers.get("content-type", "")
     try:
-        # Verificar si ya existe una combinación de id_product y status
-        check_query = """
-            SELECT id FROM prices_v2 WHERE id_product = %s AND status = %s
-        """
-        cursor.execute(check_query, (str(price.id_product), price.status))
-        existing_price = cursor.fetchone()
-
-        if existing_price:
-            raise HTTPException(
-                status_code=424,
-                detail=f"Ya existe esa combinación de precios para ese producto."
-            )
+        if "csv" in content_type:
+            text = (await request.body()).decode("utf-8-sig")
+            raw_rows = list(csv.DictReader(io.StringIO(text)))
+        else:
+            raw_rows = await request.json()
+    except ValueError:
+        raise HTTPException(status_code=424, detail="Cuerpo de la petición no válido.")
 
-        # Insertar nuevo precio
-        insert_query = """
-            INSERT INTO prices_v2 (id_product, status, price) 
-            VALUES (%s, %s, %s) RETURNING id
-        """
-        values = (str(price.id_product), price.status, price.price)
-        cursor.execute(insert_query, values)
-        new_id = cursor.fetchone()["id"]
-        conn.commit()
-        price.id = new_id
+    if not isinstance(raw_rows, list):
+        raise HTTPException(status_code=424, detail="Se esperaba una lista de precios.")
+    if len(raw_rows) > BULK_MAX_ROWS:
+        raise HTTPException(status_code=413, detail=f"Máximo {BULK_MAX_ROWS} filas por carga.")
 
-        return {
-            "error": False,
-            "message": "Precio creado correctamente.",
-            "data": {"id": new_id, "price": price}
-        }
+    rows, results = [], []
+    for n, raw in enumerate(raw_rows):
+        try:
+            row = BulkPrice.model_validate(raw)
+        except ValidationError as e:
+            results.append({"row": n, "result": "invalid", "detail": e.errors(include_url=False, include_context=False)})
+            continue
+        rows.append((n, row))
+    return rows, results
 
 
-    except errors.ForeignKeyViolation:
-        conn.rollback()
-        raise HTTPException(status_code=424, detail="El producto no existe.")
+# Crear o actualizar muchos precios en una sola transacción
+@router.post("/bulk", status_code=200, responses={
+    413: {"description": "Demasiadas filas."},
+    424: {"description": "Error de validación."},
+    500: {"description": "Error interno del servidor."}
+}, openapi_extra={"requestBody": {"content": {
+    "application/json": {"schema": {"type": "array", "items": BulkPrice.model_json_schema()}},
+    "text/csv": {"schema": {"type": "string", "example": "id_product,status,price"}},
+}}})
+async def bulk_upsert_prices(request: Request):
+    rows, results = await read_bulk_rows(request)
 
-    except HTTPException as e:
-        raise e  # <-- Añadir esta línea
+    async with get_db_connection() as conn:
+        cursor = conn.cursor()
 
-    except Exception as e:
-        conn.rollback()
-        raise HTTPException(status_code=500, detail="Error al crear precio: " + str(e))
+        try:
+            await cursor.execute("""
+                CREATE TEMP TABLE prices_staging (
+                    n integer, id_product uuid, status integer, price numeric
+                ) ON COMMIT DROP
+            """)
+            async with cursor.copy("COPY prices_staging (n, id_product, status, price) FROM STDIN") as copy:
+                for n, row in rows:
+                    await copy.write_row((n, row.id_product, row.status, row.price))
 
-    finally:
-        conn.close()
+            # Filas que no se pueden insertar: producto o estado inexistente,
+            # o combinación repetida dentro de la misma carga (gana la última)
+            await cursor.execute("""
+                SELECT n, id_product, status, reason FROM (
+                    SELECT s.n, s.id_product, s.status,
+                           CASE
+                               WHEN p.id IS NULL THEN 'product_not_found'
+                               WHEN ps.id IS NULL THEN 'status_not_found'
+                               WHEN row_number() OVER (
+                                   PARTITION BY s.id_product, s.status ORDER BY s.n DESC
+                               ) > 1 THEN 'duplicate'
+                           END AS reason
+                    FROM prices_staging s
+                    LEFT JOIN products_v2 p ON p.id = s.id_product
+                    LEFT JOIN phone_status ps ON ps.id = s.status
+                ) checked
+                WHERE reason IS NOT NULL
+            """)
+            rejected = await cursor.fetchall()
+            results.extend(
+                {"row": n, "id_product": id_product, "status": status, "result": reason}
+                for n, id_product, status, reason in rejected
+            )
+
+            await cursor.execute("""
+                INSERT INTO prices_v2 (id_product, status, price)
+                SELECT DISTINCT ON (s.id_product, s.status) s.id_product, s.status, s.price
+                FROM prices_staging s
+                JOIN products_v2 p ON p.id = s.id_product
+                JOIN phone_status ps ON ps.id = s.status
+                ORDER BY s.id_product, s.status, s.n DESC
+                ON CONFLICT (id_product, status) DO UPDATE SET price = EXCLUDED.price
+                RETURNING id, id_product, status, (xmax = 0) AS inserted
+            """)
+            written = {(id_product, status): (id, inserted) for id, id_product, status, inserted in await cursor.fetchall()}
+            await conn.commit()
+        except Exception as e:
+            await conn.rollback()
+            raise HTTPException(status_code=500, detail="Error en la carga de precios: " + str(e))
+
+    rejected_rows = {n for n, _, _, _ in rejected}
+    for n, row in rows:
+        if n in rejected_rows:
+            continue
+        id, inserted = written[(row.id_product, row.status)]
+        results.append({
+            "row": n, "id_product": row.id_product, "status": row.status,
+            "result": "inserted" if inserted else "updated", "id": id
+        })
+    results.sort(key=lambda r: r["row"])
+
+    summary = {}
+    for r in results:
+        summary[r["result"]] = summary.get(r["result"], 0) + 1
 
+    return {
+        "error": False,
+        "message": "Carga de precios completada.",
+        "data": {"summary": summary, "rows": results}
+    }
 
 
 # Actualizar un precio por ID
@@ -110,27 +482,25 @@ def create_price(price: Price):
     404: {"description": "Precio no encontrado."},
     500: {"description": "Error interno del servidor."}
 })
-def update_product_price(price: Price = None):
-    conn = get_db_connection()
-    cursor = conn.cursor()
+async def update_product_price(price: Price = None):
+    async with get_db_connection() as conn:
+        cursor = conn.cursor()
 
-    try:
-        query = """
-            UPDATE prices_v2 
-            SET price = %s
-            WHERE id_product = %s and status = %s
-        """
-        values = (price.price, str(price.id_product), price.status)
-        cursor.execute(query, values)
-        conn.commit()
-        if cursor.rowcount == 0:
-            raise HTTPException(status_code=404, detail="Opción de producto no encontrado.")
-        return {"error": False, "message": "Precio actualizado correctamente.", "data": None}
-    except Exception as e:
-        conn.rollback()
-        raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        conn.close()
+        try:
+            query = """
+                UPDATE prices_v2 
+                SET price = %s
+                WHERE id_product = %s and status = %s
+            """
+            values = (price.price, str(price.id_product), price.status)
+            await cursor.execute(query, values)
+            await conn.commit()
+            if cursor.rowcount == 0:
+                raise HTTPException(status_code=404, detail="Opción de producto no encontrado.")
+            return {"error": False, "message": "Precio actualizado correctamente.", "data": None}
+        except Exception as e:
+            await conn.rollback()
+            raise HTTPException(status_code=500, detail=str(e))
 
 
 # Eliminar un precio o todos los precios de un producto por ID
@@ -138,31 +508,29 @@ def update_product_price(price: Price = None):
     404: {"description": "Precio no encontrado."},
     500: {"description": "Error interno del servidor."}
 })
-def delete_price(id: UUID = Query(None, alias="id"), id_product: UUID = Query(None, alias="id_product")):
-    conn = get_db_connection()
-    cursor = conn.cursor()
+async def delete_price(id: UUID = Query(None, alias="id"), id_product: UUID = Query(None, alias="id_product")):
+    async with get_db_connection() as conn:
+        cursor = conn.cursor()
 
-    try:
-        if id_product:
-            # Eliminar todos los precios de un producto específico
-            cursor.execute("DELETE FROM prices_v2 WHERE id_product = %s", (str(id_product),))
-            conn.commit()
-            if cursor.rowcount == 0:
-                raise HTTPException(status_code=404, detail="No se encontraron precios para este producto.")
-            return {"error": False, "message": "Precios del producto eliminados correctamente.", "data": None}
+        try:
+            if id_product:
+                # Eliminar todos los precios de un producto específico
+                await cursor.execute("DELETE FROM prices_v2 WHERE id_product = %s", (str(id_product),))
+                await conn.commit()
+                if cursor.rowcount == 0:
+                    raise HTTPException(status_code=404, detail="No se encontraron precios para este producto.")
+                return {"error": False, "message": "Precios del producto eliminados correctamente.", "data": None}
 
-        if id:
-            # Eliminar un precio específico por ID
-            cursor.execute("DELETE FROM prices_v2 WHERE id = %s", (str(id),))
-            conn.commit()
-            if cursor.rowcount == 0:
-                raise HTTPException(status_code=404, detail="Precio no encontrado.")
-            return {"error": False, "message": "Precio eliminado correctamente.", "data": None}
+            if id:
+                # Eliminar un precio específico por ID
+                await cursor.execute("DELETE FROM prices_v2 WHERE id = %s", (str(id),))
+                await conn.commit()
+                if cursor.rowcount == 0:
+                    raise HTTPException(status_code=404, detail="Precio no encontrado.")
+                return {"error": False, "message": "Precio eliminado correctamente.", "data": None}
 
-        raise HTTPException(status_code=400, detail="Debe proporcionar un 'id' o 'id_product'.")
+            raise HTTPException(status_code=400, detail="Debe proporcionar un 'id' o 'id_product'.")
 
-    except Exception as e:
-        conn.rollback()
-        raise HTTPException(status_code=404, detail=str(e))
-    finally:
-        conn.close()
+        except Exception as e:
+            await conn.rollback()
+            raise HTTPException(status_code=404, detail=str(e))
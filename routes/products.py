@@ -1,194 +1,641 @@
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from database import get_db_connection
-from models import Product
+from models import Product, ProductBatch
+from pagination import Page, get_page, paginate
+from responses import dumps, json_array, raw_envelope
+from fields import parse_fields, json_object_sql
+from etag import resource_etag, etag_matches, not_modified
+from compression import brotli, choose_encoding
+from routes.reviews import review_summary_sql
 from uuid import UUID
 from typing import Optional
+import datetime
+import zlib
+
+# Filas que trae cada FETCH del cursor de servidor en la exportación
+EXPORT_ITERSIZE = 1000
+
+# Máximo de productos aceptados en una importación masiva
+BULK_MAX_ROWS = 10_000
+
+# Máximo de ids por petición en /products/batch
+BATCH_MAX_IDS = 100
 
 router = APIRouter(prefix="/products", tags=["Productos"])
 
 
+# Obtener los precios de varios productos en una sola consulta, agrupados por producto
+async def get_prices_by_product(cursor, product_ids):
+    prices = {}
+    if not product_ids:
+        return prices
+
+    await cursor.execute("""
+        SELECT pr.id_product, ps.estado, pr.price
+        FROM prices_v2 pr
+        JOIN phone_status ps ON pr.status = ps.id
+        WHERE pr.id_product = ANY(%s::uuid[])
+    """, ([str(product_id) for product_id in product_ids],))
+    for id_product, estado, price in await cursor.fetchall():
+        prices.setdefault(id_product, []).append({"status": estado, "price": price})
+    return prices
+
+
+# Campos de producto que se pueden pedir con ?fields= y su expresión SQL
+PRODUCT_FIELDS = {
+    "id": "p.id",
+    "created_at": "p.created_at",
+    "category": "p.category",
+    "brand": "p.brand",
+    "name_short": "p.name_short",
+    "name": "p.name",
+    "colors": "p.colors",
+    "storages": "p.storages",
+    "images": "p.images",
+    "tags": "p.tags",
+    "prices": """coalesce((
+        SELECT json_agg(json_build_object('status', ps.estado, 'price', pr.price))
+        FROM prices_v2 pr
+        JOIN phone_status ps ON pr.status = ps.id
+        WHERE pr.id_product = p.id
+    ), '[]'::json)""",
+}
+
+
+# JSON de producto con los campos pedidos y, si se pide, el resumen de reseñas
+def product_json_sql(fields, include_reviews=False):
+    # Postgres construye el JSON solo con los campos pedidos (sin precios si no se piden)
+    selected, allowed = parse_fields(fields, PRODUCT_FIELDS), PRODUCT_FIELDS
+    # Resumen de reseñas precalculado (product_review_summary), solo si se pide
+    if include_reviews:
+        selected, allowed = selected + ["reviews"], {**PRODUCT_FIELDS, "reviews": review_summary_sql("p.id")}
+    return json_object_sql(selected, allowed)
+
+
+# Columnas de products_v2 en el orden que espera product_to_dict (sin las de búsqueda)
+PRODUCT_COLUMNS = "id, created_at, category, brand, name_short, name, colors, storages, images, tags"
+
+
+def product_to_dict(product, prices):
+    return {
+        "id": product[0], "created_at": product[1], "category": product[2],
+        "brand": product[3], "name_short": product[4], "name": product[5], "colors": product[6],
+        "storages": product[7], "images": product[8], "tags": product[9], "prices": prices
+    }
+
+
 @router.get("", status_code=200, responses={
     404: {"description": "Producto no encontrado."},
     424: {"description": "Error de validación."},
     500: {"description": "Error interno del servidor."}
 })
-def get_products(
+async def get_products(
+    request: Request,
+    response: Response,
     id: Optional[UUID] = Query(None, alias="id"),
     category: Optional[str] = Query(None, alias="category"),
-    tags: Optional[str] = Query(None, alias="tags")  # Ej: "iphone,movil,apple"
+    tags: Optional[str] = Query(None, alias="tags"),  # Ej: "iphone,movil,apple"
+    fields: Optional[str] = Query(None, alias="fields"),  # Ej: "id,name_short"
+    include_reviews: bool = Query(False, alias="include_reviews"),
+    page: Page = Depends(get_page)
 ):
-    conn = get_db_connection()
-    cursor = conn.cursor()
+    after = page.after_id()
+    product_json = product_json_sql(fields, include_reviews)
+
+    async with get_db_connection(read_only=True) as conn:
+        cursor = conn.cursor()
+
+        try:
+            # Versión de las tablas: si el cliente ya la tiene, 304 sin consultar datos
+            etag = await resource_etag(cursor, "products_reviews" if include_reviews else "products", request)
+            if etag_matches(request, etag):
+                return not_modified(etag)
+            response.headers["ETag"] = etag
+
+            if id:
+                await cursor.execute(f"SELECT {product_json} FROM products_v2 p WHERE p.id = %s", (str(id),))
+                product = await cursor.fetchone()
+                if product:
+                    return raw_envelope(product[0], headers={"ETag": etag})
+                raise HTTPException(status_code=404, detail="Producto no encontrado")
+
+            # Armar query dinámico
+            query = f"SELECT p.id, {product_json} FROM products_v2 p"
+            filters = []
+            values = []
+
+            if category:
+                filters.append("p.category = %s")
+                values.append(category)
+
+            if tags:
+                tag_list = [t.strip() for t in tags.split(",") if t.strip()]
+                if tag_list:
+                    # usamos operador && para arrays que tengan intersección
+                    filters.append("p.tags && %s::text[]")
+                    values.append(tag_list)
+
+            # Paginación por cursor sobre la clave primaria
+            if after:
+                filters.append("p.id > %s")
+                values.append(after)
+
+            if filters:
+                query += " WHERE " + " AND ".join(filters)
+
+            query += " ORDER BY p.id LIMIT %s"
+            values.append(page.limit + 1)
+
+            await cursor.execute(query, tuple(values))
+            products, next_cursor = paginate(await cursor.fetchall(), page.limit, key=lambda p: p[0])
+
+            return raw_envelope(
+                json_array(product[1] for product in products),
+                headers={"ETag": etag},
+                next_cursor=next_cursor
+            )
+
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+
+
+# Varios productos por id en una sola consulta (con sus precios si se piden).
+# Respeta el orden de los ids recibidos y devuelve aparte los que no existen.
+async def get_product_batch(request, ids, fields, include_reviews, conditional):
+    ids = list(dict.fromkeys(str(product_id) for product_id in ids))
+    if not ids:
+        raise HTTPException(status_code=400, detail="Debe indicar al menos un id.")
+    if len(ids) > BATCH_MAX_IDS:
+        raise HTTPException(status_code=400, detail=f"Máximo {BATCH_MAX_IDS} ids por petición.")
+    product_json = product_json_sql(fields, include_reviews)
+
+    async with get_db_connection(read_only=True) as conn:
+        cursor = conn.cursor()
+
+        try:
+            # Solo en GET: la ETag depende de la query y en POST los ids van en el cuerpo
+            headers = None
+            if conditional:
+                etag = await resource_etag(cursor, "products_reviews" if include_reviews else "products", request)
+                if etag_matches(request, etag):
+                    return not_modified(etag)
+                headers = {"ETag": etag}
+
+            await cursor.execute(
+                f"SELECT p.id::text, {product_json} FROM products_v2 p WHERE p.id = ANY(%s::uuid[])",
+                (ids,)
+            )
+            found = dict(await cursor.fetchall())
+            return raw_envelope(
+                json_array(found[product_id] for product_id in ids if product_id in found),
+                headers=headers,
+                missing=[product_id for product_id in ids if product_id not in found]
+            )
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
 
+
+# Productos por id: /products/batch?ids=id1,id2,...
+@router.get("/batch", status_code=200, responses={
+    400: {"description": "Ids no válidos."},
+    500: {"description": "Error interno del servidor."}
+})
+async def get_products_batch(
+    request: Request,
+    ids: str = Query(..., alias="ids"),
+    fields: Optional[str] = Query(None, alias="fields"),
+    include_reviews: bool = Query(False, alias="include_reviews")
+):
     try:
-        def get_prices(product_id):
-            cursor.execute("""
-                SELECT ps.estado, pr.price
-                FROM prices_v2 pr
-                JOIN phone_status ps ON pr.status = ps.id
-                WHERE pr.id_product = %s
-            """, (str(product_id),))
-            return [{"status": estado, "price": price} for estado, price in cursor.fetchall()]
-
-        if id:
-            cursor.execute("SELECT * FROM products_v2 WHERE id = %s", (str(id),))
-            product = cursor.fetchone()
-            if product:
-                return {
-                    "error": False,
-                    "message": "OK",
-                    "data": {
-                        "id": product[0], "created_at": product[1], "category": product[2],
-                        "brand": product[3], "name_short": product[4], "name": product[5], "colors": product[6],
-                        "storages": product[7], "images": product[8], "tags": product[9], "prices": get_prices(product[0])
-                    }
-                }
-            raise HTTPException(status_code=404, detail="Producto no encontrado")
-
-        # Armar query dinámico
-        query = "SELECT * FROM products_v2"
-        filters = []
-        values = []
-
-        if category:
-            filters.append("category = %s")
-            values.append(category)
-
-        if tags:
-            tag_list = [t.strip() for t in tags.split(",") if t.strip()]
-            if tag_list:
-                # usamos operador && para arrays que tengan intersección
-                filters.append("tags && %s::text[]")
-                values.append(tag_list)
-
-        if filters:
-            query += " WHERE " + " AND ".join(filters)
-
-        cursor.execute(query, tuple(values))
-        products = cursor.fetchall()
-
-        return {
-            "error": False,
-            "message": "OK",
-            "data": [
-                {
-                    "id": product[0], "created_at": product[1], "category": product[2],
-                    "brand": product[3], "name_short": product[4], "name": product[5], "colors": product[6],
-                    "storages": product[7], "images": product[8], "tags": product[9], "prices": get_prices(product[0])
-                } for product in products
-            ]
-        }
-
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        conn.close()
+        product_ids = [UUID(i.strip()) for i in ids.split(",") if i.strip()]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Id no válido.")
+    return await get_product_batch(request, product_ids, fields, include_reviews, conditional=True)
+
+
+# Productos por id con los ids en el cuerpo (listas largas)
+@router.post("/batch", status_code=200, responses={
+    400: {"description": "Ids no válidos."},
+    500: {"description": "Error interno del servidor."}
+})
+async def post_products_batch(
+    request: Request,
+    batch: ProductBatch,
+    fields: Optional[str] = Query(None, alias="fields"),
+    include_reviews: bool = Query(False, alias="include_reviews")
+):
+    return await get_product_batch(request, batch.ids, fields, include_reviews, conditional=False)
+
+
+# Generar el catálogo como NDJSON usando un cursor de servidor con nombre
+async def export_products_ndjson(since):
+    async with get_db_connection(read_only=True) as conn:
+        prices_cursor = conn.cursor()
+        async with conn.cursor(name="products_export") as cursor:
+            cursor.itersize = EXPORT_ITERSIZE
+            if since:
+                await cursor.execute(
+                    f"SELECT {PRODUCT_COLUMNS} FROM products_v2 WHERE created_at >= %s ORDER BY id", (since,)
+                )
+            else:
+                await cursor.execute(f"SELECT {PRODUCT_COLUMNS} FROM products_v2 ORDER BY id")
+
+            while True:
+                products = await cursor.fetchmany(cursor.itersize)
+                if not products:
+                    break
+                # Precios del bloque actual en una sola consulta
+                prices = await get_prices_by_product(prices_cursor, [product[0] for product in products])
+                yield b"".join(
+                    dumps(product_to_dict(product, prices.get(product[0], []))) + b"\n"
+                    for product in products
+                )
+
+
+async def gzip_stream(chunks):
+    compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16)
+    async for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+async def brotli_stream(chunks):
+    compressor = brotli.Compressor(quality=5)
+    async for chunk in chunks:
+        data = compressor.process(chunk)
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+# Exportar el catálogo completo (productos con sus precios) en NDJSON
+@router.get("/export", status_code=200, response_class=StreamingResponse, responses={
+    200: {"content": {"application/x-ndjson": {}}, "description": "Un producto por línea."},
+    500: {"description": "Error interno del servidor."}
+})
+async def export_products(
+    request: Request,
+    since: Optional[datetime.datetime] = Query(None, alias="since")
+):
+    body = export_products_ndjson(since)
+    headers = {}
+    # Misma negociación que CompressionMiddleware (respeta q=0 y prefiere br)
+    encoding = choose_encoding(request.headers.get("accept-encoding", ""))
+    if encoding == "br":
+        body = brotli_stream(body)
+    elif encoding == "gzip":
+        body = gzip_stream(body)
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    headers["Vary"] = "Accept-Encoding"
+    return StreamingResponse(body, media_type="application/x-ndjson", headers=headers)
 
 
 @router.post("", status_code=201, responses={
     424: {"description": "Error de validación."},
     500: {"description": "Error interno del servidor."}
 })
-def create_product(product: Product):
-    conn = get_db_connection()
-    cursor = conn.cursor()
-
-    try:
-        # Verificar si el nombre del producto ya existe
-        check_query = """
-            SELECT id FROM products_v2 WHERE name = %s OR name_short = %s
-        """
-        cursor.execute(check_query, (product.name, product.name_short))
-        existing_product = cursor.fetchone()
-
-        if existing_product:
-            existing_id = existing_product[0]
-            raise HTTPException(
-                status_code=424,
-                detail={
-                    "message": "Ya existe el mismo producto.",
-                    "id": existing_id
-                }
+async def create_product(product: Product):
+    async with get_db_connection() as conn:
+        cursor = conn.cursor()
+
+        try:
+            # Verificar si el nombre del producto ya existe
+            check_query = """
+                SELECT id FROM products_v2 WHERE name = %s OR name_short = %s
+            """
+            await cursor.execute(check_query, (product.name, product.name_short))
+            existing_product = await cursor.fetchone()
+
+            if existing_product:
+                existing_id = existing_product[0]
+                raise HTTPException(
+                    status_code=424,
+                    detail={
+                        "message": "Ya existe el mismo producto.",
+                        "id": str(existing_id)
+                    }
+                )
+
+            # Si no existe, proceder con la inserción
+            insert_query = """
+                INSERT INTO products_v2 (category, brand, name_short, name, colors, storages, images, tags) 
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+                RETURNING id
+            """
+            values = (
+                product.category, product.brand, product.name_short, product.name,
+                product.colors, product.storages, product.images, product.tags
             )
+            await cursor.execute(insert_query, values)
+            new_id = (await cursor.fetchone())[0]  # Obtener el ID generado
+            await conn.commit()
+
+            return {
+                "error": False,
+                "message": "Producto creado correctamente",
+                "data": {
+                    **product.model_dump(),
+                    "id": new_id
+                }
+            }
+
+        except HTTPException as e:
+            raise e
+        except Exception as e:
+            await conn.rollback()
+            raise HTTPException(status_code=500, detail="Error al crear producto: " + str(e))
+
+
+
+# Buscar productos por texto (ranking de texto completo + similitud por trigramas)
+@router.get("/search", status_code=200, responses={
+    400: {"description": "Cursor no válido."},
+    500: {"description": "Error interno del servidor."}
+})
+async def search_products(
+    q: str = Query(..., alias="q", min_length=2, max_length=100),
+    page: Page = Depends(get_page)
+):
+    # El cursor guarda (puntuación, id) del último resultado
+    after = None
+    if page.after is not None:
+        try:
+            after = (float(page.after[0]), str(UUID(page.after[1])))
+        except (TypeError, ValueError, IndexError, KeyError):
+            raise HTTPException(status_code=400, detail="Cursor no válido.")
+
+    async with get_db_connection(read_only=True) as conn:
+        cursor = conn.cursor()
+
+        try:
+            query = """
+                SELECT * FROM (
+                    SELECT p.id, p.created_at, p.category, p.brand, p.name_short, p.name,
+                           p.colors, p.storages, p.images, p.tags,
+                           (ts_rank_cd(p.search_vector, q.tsq) + word_similarity(q.txt, p.search_text))::float8 AS score
+                    FROM products_v2 p,
+                         (SELECT websearch_to_tsquery('simple', %(q)s) AS tsq, lower(%(q)s) AS txt) q
+                    WHERE p.search_vector @@ q.tsq OR q.txt <%% p.search_text
+                ) matches
+            """
+            values = {"q": q, "limit": page.limit + 1}
+
+            if after:
+                query += " WHERE score < %(score)s OR (score = %(score)s AND id > %(id)s::uuid)"
+                values["score"], values["id"] = after
+
+            query += " ORDER BY score DESC, id LIMIT %(limit)s"
+
+            await cursor.execute(query, values)
+            products, next_cursor = paginate(await cursor.fetchall(), page.limit, key=lambda p: [p[10], str(p[0])])
+
+            # Precios de la página de resultados en una sola consulta
+            prices = await get_prices_by_product(cursor, [product[0] for product in products])
+
+            return {
+                "error": False,
+                "message": "OK",
+                "data": [
+                    {**product_to_dict(product, prices.get(product[0], [])), "score": product[10]}
+                    for product in products
+                ],
+                "next_cursor": next_cursor
+            }
+
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+
 
-        # Si no existe, proceder con la inserción
-        insert_query = """
-            INSERT INTO products_v2 (category, brand, name_short, name, colors, storages, images, tags) 
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-            RETURNING id
-        """
-        values = (
-            product.category, product.brand, product.name_short, product.name,
-            product.colors, product.storages, product.images, product.tags
-        )
-        cursor.execute(insert_query, values)
-        new_id = cursor.fetchone()[0]  # Obtener el ID generado
-        conn.commit()
-
-        return {
-            "error": False,
-            "message": "Producto creado correctamente",
-            "data": {
-                **product.model_dump(),
-                "id": new_id
+# Resumen de precios por producto para los listados (tabla product_price_summary)
+@router.get("/summary", status_code=200, responses={
+    500: {"description": "Error interno del servidor."}
+})
+async def get_products_summary(
+    request: Request,
+    response: Response,
+    category: Optional[str] = Query(None, alias="category"),
+    page: Page = Depends(get_page)
+):
+    after = page.after_id()
+
+    async with get_db_connection(read_only=True) as conn:
+        cursor = conn.cursor()
+
+        try:
+            etag = await resource_etag(cursor, "products_summary", request)
+            if etag_matches(request, etag):
+                return not_modified(etag)
+            response.headers["ETag"] = etag
+
+            query = """
+                SELECT p.id, p.category, p.brand, p.name_short, p.name, p.images,
+                       s.min_price, s.max_price, COALESCE(s.n_variants, 0), COALESCE(s.best_by_status, '{}'::jsonb)
+                FROM products_v2 p
+                LEFT JOIN product_price_summary s ON s.id_product = p.id
+            """
+            filters = []
+            values = []
+
+            if category:
+                filters.append("p.category = %s")
+                values.append(category)
+
+            if after:
+                filters.append("p.id > %s")
+                values.append(after)
+
+            if filters:
+                query += " WHERE " + " AND ".join(filters)
+
+            query += " ORDER BY p.id LIMIT %s"
+            values.append(page.limit + 1)
+
+            await cursor.execute(query, tuple(values))
+            products, next_cursor = paginate(await cursor.fetchall(), page.limit, key=lambda p: p[0])
+
+            return {
+                "error": False,
+                "message": "OK",
+                "data": [
+                    {
+                        "id": p[0], "category": p[1], "brand": p[2], "name_short": p[3], "name": p[4],
+                        "images": p[5], "min_price": p[6], "max_price": p[7], "n_variants": p[8],
+                        "prices_by_status": p[9]
+                    }
+                    for p in products
+                ],
+                "next_cursor": next_cursor
             }
-        }
 
-    except HTTPException as e:
-        raise e
-    except Exception as e:
-        conn.rollback()
-        raise HTTPException(status_code=500, detail="Error al crear producto: " + str(e))
-    finally:
-        conn.close()
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
 
 
+# Crear (o actualizar) muchos productos en una sola transacción
+@router.post("/bulk", status_code=200, responses={
+    413: {"description": "Demasiados productos."},
+    500: {"description": "Error interno del servidor."}
+})
+async def bulk_create_products(
+    products: list[Product],
+    update_existing: bool = Query(False, alias="update_existing")
+):
+    if len(products) > BULK_MAX_ROWS:
+        raise HTTPException(status_code=413, detail=f"Máximo {BULK_MAX_ROWS} productos por importación.")
+
+    results = [None] * len(products)
+
+    # Duplicados dentro del propio lote: apuntan a la primera aparición
+    first_by_name, first_by_short, batch_duplicates = {}, {}, {}
+    candidates = []
+    for n, product in enumerate(products):
+        first = first_by_name.get(product.name, first_by_short.get(product.name_short))
+        if first is not None:
+            batch_duplicates[n] = first
+            continue
+        first_by_name[product.name] = n
+        first_by_short[product.name_short] = n
+        candidates.append(n)
+
+    async with get_db_connection() as conn:
+        cursor = conn.cursor()
+
+        try:
+            # Serializar importaciones concurrentes para que no se pisen entre sí
+            await cursor.execute("SELECT pg_advisory_xact_lock(hashtext('products_v2_bulk'))")
+
+            # Duplicados contra la base de datos en una sola consulta
+            await cursor.execute(
+                "SELECT id, name, name_short FROM products_v2 WHERE name = ANY(%s) OR name_short = ANY(%s)",
+                ([products[n].name for n in candidates], [products[n].name_short for n in candidates])
+            )
+            existing_by_name, existing_by_short = {}, {}
+            for id, name, name_short in await cursor.fetchall():
+                existing_by_name[name] = id
+                existing_by_short[name_short] = id
+
+            to_insert, to_update = [], []
+            for n in candidates:
+                product = products[n]
+                existing_id = existing_by_name.get(product.name) or existing_by_short.get(product.name_short)
+                if existing_id is None:
+                    to_insert.append(n)
+                elif update_existing:
+                    to_update.append((n, existing_id))
+                else:
+                    results[n] = {"row": n, "result": "duplicate", "id": existing_id}
+
+            if to_insert:
+                await cursor.execute("""
+                    CREATE TEMP TABLE products_staging (
+                        n integer, category integer, brand integer, name_short text, name text,
+                        colors text[], storages integer[], images text[], tags text[]
+                    ) ON COMMIT DROP
+                """)
+                async with cursor.copy(
+                    "COPY products_staging (n, category, brand, name_short, name, colors, storages, images, tags) FROM STDIN"
+                ) as copy:
+                    copy.set_types(["int4", "int4", "int4", "text", "text", "text[]", "int4[]", "text[]", "text[]"])
+                    for n in to_insert:
+                        product = products[n]
+                        await copy.write_row((
+                            n, product.category, product.brand, product.name_short, product.name,
+                            product.colors, product.storages, product.images, product.tags
+                        ))
+
+                await cursor.execute("""
+                    INSERT INTO products_v2 (category, brand, name_short, name, colors, storages, images, tags)
+                    SELECT category, brand, name_short, name, colors, storages, images, tags
+                    FROM products_staging ORDER BY n
+                    RETURNING id, name
+                """)
+                new_ids = dict((name, id) for id, name in await cursor.fetchall())
+                for n in to_insert:
+                    results[n] = {"row": n, "result": "created", "id": new_ids[products[n].name]}
+
+            if to_update:
+                await cursor.executemany("""
+                    UPDATE products_v2
+                    SET category = %s, brand = %s, name_short = %s, name = %s,
+                        colors = %s, storages = %s, images = %s, tags = %s
+                    WHERE id = %s
+                """, [
+                    (
+                        products[n].category, products[n].brand, products[n].name_short, products[n].name,
+                        products[n].colors, products[n].storages, products[n].images, products[n].tags, existing_id
+                    )
+                    for n, existing_id in to_update
+                ])
+                for n, existing_id in to_update:
+                    results[n] = {"row": n, "result": "updated", "id": existing_id}
+
+            await conn.commit()
+
+        except Exception as e:
+            await conn.rollback()
+            raise HTTPException(status_code=500, detail="Error al importar productos: " + str(e))
+
+    for n, first in batch_duplicates.items():
+        results[n] = {"row": n, "result": "duplicate", "id": results[first]["id"], "duplicate_of_row": first}
+
+    summary = {}
+    for r in results:
+        summary[r["result"]] = summary.get(r["result"], 0) + 1
+
+    return {
+        "error": False,
+        "message": "Importación de productos completada.",
+        "data": {"summary": summary, "rows": results}
+    }
+
 
 # Actualizar un producto por ID
 @router.put("", status_code=200, responses={
     404: {"description": "Producto no encontrado."},
     500: {"description": "Error interno del servidor."}
 })
-def update_product(id: UUID = Query(..., alias="id"), product: Product = None):
-    conn = get_db_connection()
-    cursor = conn.cursor()
+async def update_product(id: UUID = Query(..., alias="id"), product: Product = None):
+    async with get_db_connection() as conn:
+        cursor = conn.cursor()
+
+        try:
+            # Verificar si el producto existe
+            await cursor.execute("SELECT 1 FROM products_v2 WHERE id = %s", (str(id),))
+            if await cursor.fetchone() is None:
+                raise HTTPException(status_code=404, detail="Producto no encontrado.")
+
+            # Actualizar el producto
+            query = """
+                UPDATE products_v2
+                SET category = %s, brand = %s, name_short = %s, name = %s,
+                    colors = %s, storages = %s, images = %s, tags = %s
+                WHERE id = %s
+            """
+            values = (
+                product.category, product.brand, product.name_short, product.name,
+                product.colors, product.storages, product.images, product.tags, str(id)
+            )
+            await cursor.execute(query, values)
+            await conn.commit()
 
-    try:
-        # Verificar si el producto existe
-        cursor.execute("SELECT 1 FROM products_v2 WHERE id = %s", (str(id),))
-        if cursor.fetchone() is None:
-            raise HTTPException(status_code=404, detail="Producto no encontrado.")
-
-        # Actualizar el producto
-        query = """
-            UPDATE products_v2
-            SET category = %s, brand = %s, name_short = %s, name = %s,
-                colors = %s, storages = %s, images = %s, tags = %s
-            WHERE id = %s
-        """
-        values = (
-            product.category, product.brand, product.name_short, product.name,
-            product.colors, product.storages, product.images, product.tags, str(id)
-        )
-        cursor.execute(query, values)
-        conn.commit()
-
-        if cursor.rowcount == 0:
-            raise HTTPException(status_code=404, detail="Producto no encontrado")
-
-        return {
-            "error": False,
-            "message": "Producto actualizado correctamente",
-            "data": {"id": str(id)}
-        }
-
-    except HTTPException as e:
-        raise e
-    except Exception as e:
-        conn.rollback()
-        raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        conn.close()
+            if cursor.rowcount == 0:
+                raise HTTPException(status_code=404, detail="Producto no encontrado")
+
+            return {
+                "error": False,
+                "message": "Producto actualizado correctamente",
+                "data": {"id": str(id)}
+            }
+
+        except HTTPException as e:
+            raise e
+        except Exception as e:
+            await conn.rollback()
+            raise HTTPException(status_code=500, detail=str(e))
 
 
 
@@ -198,29 +645,27 @@ def update_product(id: UUID = Query(..., alias="id"), product: Product = None):
     404: {"description": "Producto no encontrado."},
     500: {"description": "Error interno del servidor."}
 })
-def delete_product(id: UUID = Query(..., alias="id")):
-    conn = get_db_connection()
-    cursor = conn.cursor()
-
-    try:
-        # Verificar si el producto existe
-        cursor.execute("SELECT 1 FROM products_v2 WHERE id = %s", (str(id),))
-        if cursor.fetchone() is None:
-            raise HTTPException(status_code=404, detail="Producto no encontrado.")
-
-        # Eliminar el producto
-        cursor.execute("DELETE FROM products_v2 WHERE id = %s", (str(id),))
-        conn.commit()
-
-        if cursor.rowcount == 0:
-            raise HTTPException(status_code=404, detail="Producto no encontrado.")
-
-        return {"error": False, "message": "Producto eliminado correctamente", "data": None}
-
-    except HTTPException as e:
-        raise e
-    except Exception as e:
-        conn.rollback()
-        raise HTTPException(status_code=500, detail="Error interno del servidor: " + str(e))
-    finally:
-        conn.close()
+async def delete_product(id: UUID = Query(..., alias="id")):
+    async with get_db_connection() as conn:
+        cursor = conn.cursor()
+
+        try:
+            # Verificar si el producto existe
+            await cursor.execute("SELECT 1 FROM products_v2 WHERE id = %s", (str(id),))
+            if await cursor.fetchone() is None:
+                raise HTTPException(status_code=404, detail="Producto no encontrado.")
+
+            # Eliminar el producto
+            await cursor.execute("DELETE FROM products_v2 WHERE id = %s", (str(id),))
+            await conn.commit()
+
+            if cursor.rowcount == 0:
+                raise HTTPException(status_code=404, detail="Producto no encontrado.")
+
+            return {"error": False, "message": "Producto eliminado correctamente", "data": None}
+
+        except HTTPException as e:
+            raise e
+        except Exception as e:
+            await conn.rollback()
+            raise HTTPException(status_code=500, detail="Error interno del servidor: " + str(e))
@@ -1,43 +1,132 @@
-from fastapi import APIRouter, HTTPException, Query
-from psycopg2.extras import RealDictCursor
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
 from database import get_db_connection
+from pagination import Page, get_page, paginate
+from responses import json_array, raw_envelope
+from fields import parse_fields, json_object_sql
 from uuid import UUID
 
 router = APIRouter(prefix="/reviews", tags=["Reseñas"])
 
+# Campos de review que se pueden pedir con ?fields= y su expresión SQL
+REVIEW_FIELDS = {
+    "id": "r.id",
+    "stars": "r.stars",
+    "comment": "r.comment",
+    "image": "r.image",
+    "product_id": "r.product_id",
+    "model": "pr.name_short",
+    "name_user": "u.name",
+}
+
+
+# JSON del resumen de reseñas a partir de una fila de product_review_summary (o NULL)
+def review_summary_json(rs="rs"):
+    return f"""json_build_object(
+        'count', coalesce({rs}.n_reviews, 0),
+        'average', round(({rs}.stars_sum / {rs}.n_reviews)::numeric, 2),
+        'histogram', json_build_object(
+            '1', coalesce({rs}.stars_1, 0), '2', coalesce({rs}.stars_2, 0), '3', coalesce({rs}.stars_3, 0),
+            '4', coalesce({rs}.stars_4, 0), '5', coalesce({rs}.stars_5, 0)
+        )
+    )"""
+
+
+# Resumen de reseñas de un producto: una lectura por clave primaria, sin recorrer reviews
+def review_summary_sql(product_column):
+    return f"""(
+        SELECT {review_summary_json()}
+        FROM (SELECT 1) one
+        LEFT JOIN product_review_summary rs ON rs.product_id = {product_column}
+    )"""
+
 # Obtener reviews
 @router.get("", status_code=200, responses={
     404: {"description": "Review no encontrada."},
     500: {"description": "Error interno del servidor."}
 })
-def get_reviews():
-    conn = get_db_connection()
-    cursor = conn.cursor()
-
-    try:
-        cursor.execute('SELECT r.id, r.stars, r.comment, r.image, pr.id as product_id, pr.name_short, u.name as name_user ' \
-                'FROM reviews r ' \
-                'INNER JOIN products_v2 pr ON r.product_id = pr.id ' \
-                'INNER JOIN users u ON r.id_user = u.id;')
-        reviews = cursor.fetchall()
-        return {
-            "error": False,
-            "message": "OK",
-            "data": [
-                {
-                    "id": p[0],
-                    "stars": p[1],
-                    "comment": p[2],
-                    "image": p[3],
-                    "product_id": p[4],
-                    "model": p[5],
-                    "name_user": p[6]
-                }
-                for p in reviews
-            ]
-        }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        conn.close()
+async def get_reviews(
+    product_id: Optional[UUID] = Query(None, alias="product_id"),
+    fields: str | None = Query(None, alias="fields"),  # Ej: "stars,comment"
+    page: Page = Depends(get_page)
+):
+    after = page.after_id()
+    selected = parse_fields(fields, REVIEW_FIELDS)
+
+    async with get_db_connection(read_only=True) as conn:
+        cursor = conn.cursor()
+
+        try:
+            # Solo se unen products_v2 y users si se piden sus campos
+            query = f'SELECT r.id, {json_object_sql(selected, REVIEW_FIELDS)} FROM reviews r '
+            if "model" in selected:
+                query += 'INNER JOIN products_v2 pr ON r.product_id = pr.id '
+            if "name_user" in selected:
+                query += 'INNER JOIN users u ON r.id_user = u.id '
+            filters = []
+            values = []
+
+            # Reseñas de un producto (índice reviews (product_id, id))
+            if product_id:
+                filters.append('r.product_id = %s')
+                values.append(str(product_id))
+
+            # Paginación por cursor sobre la clave primaria de reviews
+            if after:
+                filters.append('r.id > %s')
+                values.append(after)
+
+            if filters:
+                query += 'WHERE ' + ' AND '.join(filters) + ' '
+
+            query += 'ORDER BY r.id LIMIT %s'
+            values.append(page.limit + 1)
+
+            await cursor.execute(query, tuple(values))
+            reviews, next_cursor = paginate(await cursor.fetchall(), page.limit, key=lambda p: p[0])
+            return raw_envelope(json_array(p[1] for p in reviews), next_cursor=next_cursor)
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+
+
+# Resumen de reseñas por producto: número, media e histograma de estrellas
+@router.get("/summary", status_code=200, responses={
+    404: {"description": "Producto no encontrado."},
+    500: {"description": "Error interno del servidor."}
+})
+async def get_reviews_summary(
+    product_id: Optional[UUID] = Query(None, alias="product_id"),
+    page: Page = Depends(get_page)
+):
+    after = page.after_id()
+
+    async with get_db_connection(read_only=True) as conn:
+        cursor = conn.cursor()
+
+        try:
+            if product_id:
+                await cursor.execute(
+                    f"SELECT {review_summary_sql('p.id')}::text FROM products_v2 p WHERE p.id = %s",
+                    (str(product_id),)
+                )
+                summary = await cursor.fetchone()
+                if summary is None:
+                    raise HTTPException(status_code=404, detail="Producto no encontrado.")
+                return raw_envelope(summary[0])
+
+            # Solo productos con reseñas, paginados por product_id
+            query = f"SELECT rs.product_id, json_build_object('product_id', rs.product_id, 'summary', {review_summary_json()})::text FROM product_review_summary rs "
+            values = []
+            if after:
+                query += "WHERE rs.product_id > %s "
+                values.append(after)
+            query += "ORDER BY rs.product_id LIMIT %s"
+            values.append(page.limit + 1)
 
+            await cursor.execute(query, tuple(values))
+            summaries, next_cursor = paginate(await cursor.fetchall(), page.limit, key=lambda s: s[0])
+            return raw_envelope(json_array(s[1] for s in summaries), next_cursor=next_cursor)
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,43 @@
+# Calentamiento del worker antes de aceptar tráfico: conexiones del pool y
+# cachés de datos de referencia (categorías, estados y marcas).
+
+import logging
+from fastapi import HTTPException, Request, Response
+import database
+from routes import brands, categories, phone_status
+
+logger = logging.getLogger("backmarket.startup")
+
+
+# Petición mínima para llamar a los handlers (la ETag depende de la query)
+def _request(path, query=""):
+    return Request({
+        "type": "http", "method": "GET", "scheme": "http", "path": path,
+        "query_string": query.encode(), "headers": [],
+    })
+
+
+async def warm_caches():
+    body = await categories.get_categories(_request("/categories"), Response(), id=None)
+    await phone_status.get_status(_request("/phone_status"), Response(), id=None)
+    await brands.get_brands(_request("/brands"), Response(), category=None)
+    for category in body["data"]:
+        try:
+            await brands.get_brands(_request("/brands", f"category={category['id']}"), Response(),
+                                    category=category["id"])
+        except HTTPException:
+            # Categoría sin marcas
+            pass
+
+
+async def warm_up():
+    await database.pool.warm(database.POOL_WARM_SIZE)
+    for replica in database.replica_set.replicas:
+        if not replica.pool.closed:
+            await replica.pool.warm(database.POOL_WARM_SIZE)
+    try:
+        await warm_caches()
+    except Exception as e:
+        # Las cachés se llenarán con las primeras peticiones
+        logger.warning("No se pudieron precargar las cachés: %s", e)
+    logger.info("Worker listo: %d conexiones abiertas.", database.pool.stats()["size"])